@@ -0,0 +1,231 @@
+import itertools
+import os
+import queue
+import subprocess
+import threading
+import time
+from cancel_token import CommandCancelled
+
+
+class AdbCommandLost(Exception):
+    # The command was written to the shell but its result never came back
+    # (timeout, shell died). It may have run on the device, so it must not
+    # be sent again, through the pool or the dnconsole fallback.
+    def __init__(self, message, timed_out=False):
+        super().__init__(message)
+        self.timed_out = timed_out
+
+
+class AdbShellSession:
+    # One long-lived "adb -s <serial> shell" process. Commands are written to its
+    # stdin followed by an echo of a unique marker, and output is read back up to
+    # that marker, so many commands share a single process.
+    def __init__(self, adb_path, serial, timeout=10):
+        self.adb_path = adb_path
+        self.serial = serial
+        self.timeout = timeout
+        self.proc = None
+        self.lines = None
+        self.lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def open(self):
+        startupinfo = None
+        if os.name == 'nt':
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+
+        self.proc = subprocess.Popen(
+            [self.adb_path, '-s', self.serial, 'shell'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1,
+            startupinfo=startupinfo
+        )
+        # Reader thread so a hung shell can be detected with a timeout
+        self.lines = queue.Queue()
+        threading.Thread(target=self._read_loop, args=(self.proc, self.lines), daemon=True).start()
+        try:
+            self._handshake()
+        except Exception:
+            self.close()
+            raise
+
+    def _handshake(self):
+        # Only hand out a shell that answers. "device not found" or a detached
+        # adb server end the process straight away; open() then fails and
+        # the caller falls back to dnconsole adb, instead of every command
+        # counting as sent and lost.
+        marker = f"__LDREADY_{next(self._counter)}__"
+        try:
+            self.proc.stdin.write(f"echo {marker}\n")
+            self.proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise ConnectionError(f"adb shell for {self.serial} is not accepting input: {e}")
+        output = []
+        deadline = time.time() + self.timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise ConnectionError(f"adb shell for {self.serial} did not answer")
+            try:
+                line = self.lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                raise ConnectionError(f"adb shell for {self.serial} closed: {' '.join(output).strip()}")
+            line = line.rstrip('\r\n')
+            if line == marker:
+                return
+            output.append(line)
+
+    def _read_loop(self, proc, lines):
+        try:
+            for line in proc.stdout:
+                lines.put(line)
+        except Exception:
+            pass
+        lines.put(None) # EOF
+
+    def is_alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def run(self, cmd, timeout=None, cancel=None):
+        # Returns the command output. Raises ConnectionError if the command
+        # could not be sent (safe to retry) and AdbCommandLost if it was sent
+        # to a shell that had answered the open() handshake, but no result
+        # came back (not safe to retry).
+        # Raises CommandCancelled when the cancel token fires; the shell still
+        # owes the rest of that output, so the session must be closed then.
+        with self.lock:
+            if not self.is_alive():
+                raise ConnectionError(f"adb shell for {self.serial} is not running")
+
+            marker = f"__LDEND_{next(self._counter)}__"
+            try:
+                self.proc.stdin.write(f"{cmd}; echo {marker} $?\n")
+                self.proc.stdin.flush()
+            except (OSError, ValueError) as e:
+                raise ConnectionError(f"adb shell for {self.serial} is not accepting input: {e}")
+
+            output = []
+            deadline = time.time() + (timeout or self.timeout)
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise AdbCommandLost(f"adb shell for {self.serial} timed out on: {cmd}", timed_out=True)
+                if cancel is not None:
+                    cancel.check()
+                    remaining = min(remaining, 0.1)
+                try:
+                    line = self.lines.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    raise AdbCommandLost(f"adb shell for {self.serial} closed while running: {cmd}")
+                line = line.rstrip('\r\n')
+                if line.startswith(marker):
+                    return '\n'.join(output).strip()
+                output.append(line)
+
+    def close(self):
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.write("exit\n")
+            proc.stdin.flush()
+            proc.stdin.close()
+        except Exception:
+            pass
+        try:
+            proc.wait(timeout=2)
+        except Exception:
+            proc.kill()
+
+
+class AdbConnectionPool:
+    # Keeps one AdbShellSession per instance index. A session that can't take
+    # the command is reopened once; if that fails too the caller gets None and
+    # should fall back to "dnconsole adb". A command that was sent but lost
+    # raises AdbCommandLost instead and is never re-sent. Indices that cannot connect are not retried until
+    # retry_delay has passed, so the fallback does not pay a failed spawn each time.
+    def __init__(self, controller, timeout=10, retry_delay=30):
+        self.controller = controller
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.sessions = {} # index -> AdbShellSession
+        self.failed_until = {} # index -> timestamp
+        self.lock = threading.Lock()
+
+    def _get_session(self, index):
+        with self.lock:
+            session = self.sessions.get(index)
+            if session and session.is_alive():
+                return session
+
+            if time.time() < self.failed_until.get(index, 0):
+                return None
+
+            adb_path = self.controller.get_adb_path()
+            if not adb_path:
+                return None
+
+            if session:
+                session.close()
+            session = AdbShellSession(adb_path, self.controller.get_adb_serial(index), self.timeout)
+            try:
+                session.open()
+            except Exception as e:
+                print(f"[AdbPool] Could not open adb shell for index {index}: {e}")
+                self.failed_until[index] = time.time() + self.retry_delay
+                self.sessions.pop(index, None)
+                return None
+
+            self.sessions[index] = session
+            self.failed_until.pop(index, None)
+            return session
+
+    def run(self, index, cmd, timeout=None, cancel=None):
+        index = str(index)
+        for attempt in range(2):
+            session = self._get_session(index)
+            if session is None:
+                return None
+            try:
+                return session.run(cmd, timeout, cancel)
+            except CommandCancelled:
+                session.close()
+                return ""
+            except AdbCommandLost as e:
+                print(f"[AdbPool] {e}, not sending it again")
+                session.close()
+                raise
+            except Exception as e:
+                print(f"[AdbPool] Session for index {index} failed ({e}), reconnecting...")
+                session.close()
+
+        # Reconnect did not help either, back off and let the caller fall back
+        with self.lock:
+            self.failed_until[index] = time.time() + self.retry_delay
+        return None
+
+    def close(self, index):
+        index = str(index)
+        with self.lock:
+            session = self.sessions.pop(index, None)
+            self.failed_until.pop(index, None)
+        if session:
+            session.close()
+
+    def close_all(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions = {}
+            self.failed_until = {}
+        for session in sessions:
+            session.close()
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from command_runner import CommandResult, command_timeout, kill_process_tree, popen_kwargs
+from ld_controller import (
+    find_console_path, parse_list2,
+    tap_cmd, swipe_cmd, input_text_cmd, start_app_cmd, stop_app_cmd
+)
+
+class AsyncLDPlayerController:
+    # asyncio version of LDPlayerController. Every method is a coroutine and at
+    # most max_concurrency dnconsole processes run at once across all callers,
+    # so hundreds of instances can be driven from one event loop.
+    #
+    #   ctl = AsyncLDPlayerController(max_concurrency=8)
+    #   await asyncio.gather(*(ctl.start_instance(i) for i in range(100)))
+    def __init__(self, console_path=None, max_concurrency=8):
+        self.console_path = console_path
+        if not self.console_path:
+            self.console_path = find_console_path()
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def execute_command(self, cmd_args, timeout=None):
+        # Returns a CommandResult; the process tree is killed after timeout
+        # (per-command default from COMMAND_TIMEOUTS) or when the awaiting
+        # task is cancelled
+        if not self.console_path:
+            raise FileNotFoundError("LDPlayer console (dnconsole.exe) not found.")
+
+        full_cmd = [self.console_path] + [str(a) for a in cmd_args]
+        timeout = timeout or command_timeout(cmd_args)
+
+        async with self.semaphore:
+            start = time.time()
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *full_cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    **popen_kwargs()
+                )
+            except Exception as e:
+                print(f"Error executing command {' '.join(full_cmd)}: {e}")
+                return CommandResult(full_cmd, duration=time.time() - start, error=str(e))
+
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                kill_process_tree(proc.pid)
+                await proc.wait()
+                print(f"Command timed out after {timeout}s, killed: {' '.join(full_cmd)}")
+                return CommandResult(full_cmd, duration=time.time() - start, timed_out=True)
+            except asyncio.CancelledError:
+                kill_process_tree(proc.pid)
+                raise
+
+        # LDPlayer outputs GBK
+        return CommandResult(
+            full_cmd,
+            returncode=proc.returncode,
+            stdout=stdout.decode('gbk', errors='replace'),
+            stderr=stderr.decode('gbk', errors='replace'),
+            duration=time.time() - start
+        )
+
+    async def run_adb_cmd(self, index, cmd_args):
+        full_cmd = ['adb', '--index', str(index), '--command', f'"{cmd_args}"']
+        result = await self.execute_command(full_cmd)
+        return result.output
+
+    async def adb_swipe(self, index, x1, y1, x2, y2, duration=300):
+        await self.run_adb_cmd(index, swipe_cmd(x1, y1, x2, y2, duration))
+
+    async def adb_tap(self, index, x, y):
+        await self.run_adb_cmd(index, tap_cmd(x, y))
+
+    async def adb_input_text(self, index, text):
+        await self.run_adb_cmd(index, input_text_cmd(text))
+
+    async def adb_start_app(self, index, package_name):
+        await self.run_adb_cmd(index, start_app_cmd(package_name))
+
+    async def adb_stop_app(self, index, package_name):
+        await self.run_adb_cmd(index, stop_app_cmd(package_name))
+
+    async def list_instances(self):
+        result = await self.execute_command(['list2'])
+        return parse_list2(result.output)
+
+    async def start_instance(self, index):
+        return await self.execute_command(['launch', '--index', str(index)])
+
+    async def stop_instance(self, index):
+        return await self.execute_command(['quit', '--index', str(index)])
+
+    async def quit_all(self):
+        return await self.execute_command(['quitall'])
+
+    async def reboot_instance(self, index):
+        return await self.execute_command(['reboot', '--index', str(index)])
+
+    async def create_instance(self, name):
+        return await self.execute_command(['add', '--name', name])
+
+    async def remove_instance(self, index):
+        return await self.execute_command(['remove', '--index', str(index)])
+
+    async def modify_instance(self, index, cpu, memory, resolution=None):
+        cmd = ['modify', '--index', str(index), '--cpu', str(cpu), '--memory', str(memory)]
+        if resolution:
+            cmd.extend(['--resolution', resolution])
+        return await self.execute_command(cmd)
+
+    async def sort_windows(self):
+        return await self.execute_command(['sortWnd'])
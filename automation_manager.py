@@ -1,22 +1,193 @@
+import heapq
+import itertools
+import queue
 import random
 import threading
+import statistics
 import time
+import traceback
+from collections import deque
 from datetime import datetime
+from cancel_token import CancelToken
+from status_monitor import EVENT_CRASHED
+from instance_watchdog import CircuitBreaker, InstanceWatchdog
+
+# Scheduler states of each selected instance
+STATE_QUEUED = "queued"
+STATE_BOOTING = "booting"
+STATE_READY = "ready"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed" # gave up after max_retries
+ACTIVE_STATES = (STATE_BOOTING, STATE_READY, STATE_RUNNING) # hold a max_active slot
+
+class InstanceJob:
+    def __init__(self, index, priority=0):
+        self.index = index
+        self.priority = priority
+        self.state = STATE_QUEUED
+        self.attempts = 0 # failed attempts so far
+        self.last_error = None
+        self.removed = False # taken out of a running automation while active
+        self.run_id = 0 # bumped on every launch/reboot, stale runner events are ignored
+        self.breaker = CircuitBreaker() # hang reboots
+        self.launched_at = None
+        self.ready_at = None
+        self.finished_at = None
+
+class JobQueue:
+    # Instances waiting for a slot. Higher priority first, FIFO within a
+    # priority; a job can be held back until a given time (retry backoff).
+    # Thread-safe so instances can be added or removed while the scheduler runs.
+    def __init__(self):
+        self.heap = [] # (-priority, seq, index)
+        self.entries = {} # index -> (not_before, seq) of the live entry
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def push(self, index, priority=0, not_before=0):
+        with self.lock:
+            seq = next(self.counter)
+            self.entries[index] = (not_before, seq)
+            heapq.heappush(self.heap, (-priority, seq, index))
+
+    def remove(self, index):
+        # Lazy: the heap entry is skipped when it surfaces
+        with self.lock:
+            return self.entries.pop(index, None) is not None
+
+    def _is_live(self, item):
+        entry = self.entries.get(item[2])
+        return entry is not None and entry[1] == item[1]
+
+    def _prune(self):
+        # Drop removed/replaced entries from the top of the heap
+        while self.heap and not self._is_live(self.heap[0]):
+            heapq.heappop(self.heap)
+
+    def peek_ready(self, now):
+        # Best index whose backoff has expired, or None
+        with self.lock:
+            self._prune()
+            if not self.heap:
+                return None
+            top = self.heap[0]
+            if self.entries[top[2]][0] <= now:
+                return top[2]
+            # Top is backing off, look further down
+            for item in sorted(self.heap):
+                if self._is_live(item) and self.entries[item[2]][0] <= now:
+                    return item[2]
+            return None
+
+    def pop(self, index):
+        with self.lock:
+            self.entries.pop(index, None)
+
+    def next_ready_time(self):
+        with self.lock:
+            return min((nb for nb, _ in self.entries.values()), default=None)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, index):
+        return index in self.entries
+
+    def __iter__(self):
+        with self.lock:
+            return iter([item[2] for item in sorted(self.heap) if self._is_live(item)])
+
+class BootConcurrency:
+    # AIMD limit on how many instances may boot at once. A boot that completes
+    # within slow_factor x the median of the last `window` successful boots
+    # adds 1/limit (so about +1 per "round" of boots); a failed boot, or a
+    # second slow boot in a row, halves the limit. The limit stays within
+    # [min_limit, max_limit]. The median keeps one unusually fast boot from
+    # marking every normal boot after it as slow, and a single slow boot from
+    # the tail of the distribution only pauses growth. slack is added to the threshold because a boot
+    # is only seen at wait_until_ready's next probe, up to 5s late.
+    def __init__(self, min_limit=1, max_limit=4, initial=None, slow_factor=1.5, decrease=0.5, window=20, slack=5.0):
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(initial if initial is not None else self.min_limit)
+        self.limit = max(self.min_limit, min(self.limit, self.max_limit))
+        self.slow_factor = slow_factor
+        self.decrease = decrease
+        self.slack = slack
+        self.slow_streak = 0
+        self.boot_times = deque(maxlen=window) # recent successful boots, seconds
+
+    def allowed(self):
+        return int(self.limit)
+
+    def baseline(self):
+        # Typical boot time, None until a boot has completed
+        return statistics.median(self.boot_times) if self.boot_times else None
+
+    def record(self, boot_seconds, ok=True):
+        old = self.allowed()
+        # Judged against the boots before this one
+        baseline = self.baseline()
+        if ok:
+            self.boot_times.append(boot_seconds)
+
+        if ok and (baseline is None or boot_seconds <= baseline * self.slow_factor + self.slack):
+            self.slow_streak = 0
+            self.limit = min(self.max_limit, self.limit + 1.0 / max(1, self.limit))
+        elif ok and self.slow_streak == 0:
+            self.slow_streak = 1
+        else:
+            self.slow_streak += 1
+            self.limit = max(self.min_limit, self.limit * self.decrease)
+
+        if self.allowed() != old:
+            print(f"Boot concurrency {old} -> {self.allowed()} (last boot {boot_seconds:.1f}s, typical {baseline or 0:.1f}s)")
 
 class DeviceTaskRunner(threading.Thread):
-    def __init__(self, index, controller, settings, log_callback):
+    def __init__(self, index, controller, settings, log_callback, on_finished=None, cancel_token=None):
         super().__init__()
         self.index = index
         self.controller = controller
         self.settings = settings
-        self.log_callback = log_callback # Optional: function to print logs
-        self.running = True
+        self.log_callback = log_callback # Optional: called with (index, msg), e.g. InstanceLogStore.append
+        self.on_finished = on_finished # Called with (index, error) when run() exits, however it exits
+        self.error = None # Exception text if the tasks failed
+        # Cancelled by stop() or with the automation-wide token; every wait
+        # below returns as soon as it is, and in-flight dnconsole calls are killed
+        self.cancel_token = cancel_token.child() if cancel_token else CancelToken()
         self.daemon = True
 
+    @property
+    def running(self):
+        return not self.cancel_token.cancelled
+
+    @running.setter
+    def running(self, value):
+        if not value:
+            self.cancel_token.cancel()
+
+    def stop(self):
+        self.cancel_token.cancel()
+
+    def wait(self, seconds):
+        # Interruptible sleep, False if the runner was stopped meanwhile
+        return not self.cancel_token.wait(seconds)
+
     def log(self, msg):
         print(f"[Device {self.index}] {msg}")
+        if self.log_callback:
+            self.log_callback(self.index, msg)
 
     def run(self):
+        try:
+            with self.controller.cancel_scope(self.cancel_token):
+                self.run_tasks()
+        finally:
+            if self.on_finished:
+                self.on_finished(self.index, self.error)
+
+    def run_tasks(self):
         self.log("Task Runner started.")
         
         # 0. Launch App
@@ -24,11 +195,13 @@ class DeviceTaskRunner(threading.Thread):
         fb_pkg = "com.facebook.katana"
         # If user wants another app, logic would be here.
         
-        self.log("Launching Facebook...")
-        self.controller.adb_start_app(self.index, fb_pkg)
-        time.sleep(10) # Wait for load
-        
         try:
+            self.log("Launching Facebook...")
+            self.controller.adb_start_app(self.index, fb_pkg)
+            # Wait for load (up to 10s, usually much less)
+            if not self.controller.wait_for_app(self.index, fb_pkg, timeout=10, cancel=self.cancel_token) and self.running:
+                self.log("App not in foreground after 10s, continuing anyway.")
+            
             # 1. Scroll Feed
             if self.settings.get("scroll_news"):
                 min_m = int(self.settings.get("scroll_news_val1", 2))
@@ -43,7 +216,7 @@ class DeviceTaskRunner(threading.Thread):
                     y_start = random.randint(800, 1000)
                     y_end = random.randint(200, 400)
                     self.controller.adb_swipe(self.index, x, y_start, x, y_end, random.randint(500, 1000))
-                    time.sleep(random.uniform(2.0, 5.0))
+                    self.wait(random.uniform(2.0, 5.0))
             
             # 2. Add Friends
             if self.settings.get("add_friends") and self.running:
@@ -53,40 +226,39 @@ class DeviceTaskRunner(threading.Thread):
                     if not self.running: break
                     # Dummy coordinate for "Add Friend" - highly dependent on UI
                     self.controller.adb_tap(self.index, 650, 300) 
-                    time.sleep(2)
+                    if not self.wait(2): break
 
             # 3. Comments (Simulated)
             if self.settings.get("comments") and self.settings.get("comments_val2") and self.running:
                 comment_text = self.settings.get("comments_val2")
                 self.log(f"Posting comment: {comment_text}")
-                # Click comment box (approx)
-                self.controller.adb_tap(self.index, 300, 1100) 
-                time.sleep(1)
-                self.controller.adb_input_text(self.index, comment_text)
-                time.sleep(1)
-                # Send
-                self.controller.adb_tap(self.index, 650, 1150)
+                # Click comment box (approx), type, then send - one adb round trip
+                with self.controller.batch(self.index) as b:
+                    b.tap(300, 1100).sleep(1)
+                    b.input_text(comment_text).sleep(1)
+                    b.tap(650, 1150)
                 
             # 4. Wait / Loop Delay
-            if self.settings.get("loop_delay"):
+            if self.settings.get("loop_delay") and self.running:
                 min_s = int(self.settings.get("loop_delay_val1", 20))
                 max_s = int(self.settings.get("loop_delay_val2", 25))
                 wait = random.randint(min_s, max_s)
                 self.log(f"Loop delay: {wait}s")
-                time.sleep(wait)
+                self.wait(wait)
 
-            self.log("Tasks completed.")
+            self.log("Tasks completed." if self.running else "Stopped.")
             
-            # Shutdown if requested
-            if self.settings.get("shutdown"):
+            # Shutdown if requested (not when stopped half-way)
+            if self.settings.get("shutdown") and self.running:
                  self.log("Shutting down instance settings enabled.")
                  self.controller.stop_instance(self.index)
 
         except Exception as e:
             self.log(f"Error in task: {e}")
+            self.error = str(e)
 
 class AutomationManager:
-    def __init__(self, controller, update_timer_callback, log_callback=None):
+    def __init__(self, controller, update_timer_callback, log_callback=None, monitor=None, admission=None, status_callback=None):
         self.controller = controller
         self.update_timer_callback = update_timer_callback
         self.log_callback = log_callback
@@ -98,15 +270,70 @@ class AutomationManager:
         self.max_active = 1
         self.selected_instances = [] 
         self.delay_between_start = 40 
-        self.wait_after_boot = 60 
+        self.wait_after_boot = 60 # upper bound, the readiness probe usually returns much earlier
         self.task_settings = {}
         
         self.active_workers = {} # index -> thread
+        self.boot_threads = {} # index -> thread starting/waiting for that instance
         
-    def start_automation(self, selected_instances, max_active, interval_delay=40, boot_delay=60, task_settings=None):
+        # Scheduler state, see _worker_loop. jobs, pending, active_workers and
+        # boot_threads are changed by the scheduler thread and by UI calls
+        # (add_instances, ...); every access outside the scheduler holds lock
+        self.lock = threading.RLock()
+        self.jobs = {} # index -> InstanceJob
+        self.pending = JobQueue() # indices waiting for a slot
+        self.max_retries = 3
+        self.retry_backoff = 30 # seconds, doubles with every failed attempt
+        self.completed_count = 0
+        self.failed_count = 0
+        self.events = queue.Queue() # (kind, index, payload) from boot watchers and runners
+        
+        # Heartbeats active instances, hung ones are rebooted (see _handle_hung)
+        self.watchdog_enabled = True
+        self.watchdog = None
+        self.boot_control = BootConcurrency()
+        self.ramp_up_seconds = None # time until the fleet first filled its slots
+        
+        # Host RAM/CPU admission check for each launch (None = slots only)
+        self.admission = admission
+        self.status_callback = status_callback # gets the reason the queue is paused ("" when not)
+        self.paused_reason = ""
+        
+        # Cancelled by stop_automation: every wait of this run returns and
+        # in-flight dnconsole calls of boot and runner threads are killed
+        self.cancel_token = CancelToken()
+        self.stop_timeout = 2.0 # seconds stop_automation waits for the threads
+        
+        # Time source of every scheduling decision, replaced by the fleet simulator
+        self.clock = time.time
+        self.started_at = None # clock() at start_automation
+        self.next_launch_at = 0
+        self.idle_poll = 1.0 # re-check blockers this often while nothing happens
+        
+        # State changes come from the shared StatusMonitor instead of our own polling
+        self.monitor = monitor
+        if self.monitor:
+            self.monitor.subscribe(self._on_status_event)
+        
+    def start_automation(self, selected_instances, max_active, interval_delay=40, boot_delay=60, task_settings=None, min_boots=1, max_boots=None, priorities=None):
         if self.running:
             return
-            
+        self.configure_run(selected_instances, max_active, interval_delay, boot_delay, task_settings, min_boots, max_boots, priorities)
+        
+        # Start timer thread
+        self.timer_thread = threading.Thread(target=self._timer_loop, daemon=True)
+        self.timer_thread.start()
+        
+        # Start worker thread
+        self.thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self.thread.start()
+        
+        if self.watchdog_enabled:
+            self.watchdog = InstanceWatchdog(self)
+            self.watchdog.start()
+        
+    def configure_run(self, selected_instances, max_active, interval_delay=40, boot_delay=60, task_settings=None, min_boots=1, max_boots=None, priorities=None):
+        # Resets the scheduler state for a new run without starting any threads
         self.selected_instances = list(selected_instances)
         self.max_active = int(max_active)
         self.delay_between_start = int(interval_delay)
@@ -115,26 +342,112 @@ class AutomationManager:
         
         self.running = True
         self.start_time = datetime.now()
+        self.started_at = self.clock()
+        self.next_launch_at = 0
+        self.cancel_token = CancelToken()
         self.active_workers = {}
+        self.boot_threads = {}
+        self.jobs = {}
+        self.pending = JobQueue()
+        self.completed_count = 0
+        self.failed_count = 0
+        self.events = queue.Queue()
+        for idx in self.selected_instances:
+            self._enqueue(idx, (priorities or {}).get(idx, 0))
+        # Concurrent boots adapt to observed boot times, between min_boots and max_boots
+        self.boot_control = BootConcurrency(min_boots, max_boots or self.max_active)
+        self.ramp_up_seconds = None
         
-        # Start timer thread
-        self.timer_thread = threading.Thread(target=self._timer_loop, daemon=True)
-        self.timer_thread.start()
-        
-        # Start worker thread
-        self.thread = threading.Thread(target=self._worker_loop, daemon=True)
-        self.thread.start()
-        
-    def stop_automation(self):
+    def _enqueue(self, idx, priority=0):
+        self.jobs[idx] = InstanceJob(idx, priority)
+        self.pending.push(idx, priority)
+
+    def add_instances(self, indices, priority=0):
+        # Adds instances to a running automation. Ones that are queued or active are left alone.
+        added = []
+        with self.lock:
+            for idx in indices:
+                job = self.jobs.get(idx)
+                if job and job.state not in (STATE_DONE, STATE_FAILED):
+                    continue
+                self._enqueue(idx, priority)
+                added.append(idx)
+        if added:
+            print(f"Added to queue: {added}")
+            self.events.put(("wake", None, None))
+        return added
+
+    def remove_instances(self, indices):
+        # Drops queued instances and stops the task runners of active ones
+        removed = []
+        with self.lock:
+            for idx in indices:
+                job = self.jobs.get(idx)
+                if job is None:
+                    continue
+                if self.pending.remove(idx):
+                    job.state = STATE_DONE
+                    removed.append(idx)
+                elif job.state in ACTIVE_STATES:
+                    job.removed = True
+                    worker = self.active_workers.get(idx)
+                    if worker:
+                        worker.running = False
+                    removed.append(idx)
+        if removed:
+            print(f"Removed from automation: {removed}")
+            self.events.put(("wake", None, None))
+        return removed
+
+    def _on_status_event(self, event, inst):
+        # Readiness is checked by the boot watcher itself (wait_until_ready),
+        # only crashes matter here
+        if event != EVENT_CRASHED:
+            return
+        idx = inst['index']
+        with self.lock:
+            worker = self.active_workers.get(idx)
+        if worker:
+            # Nothing left to drive, free the slot
+            self.log(idx, f"Instance {idx} crashed, stopping its task runner.")
+            worker.error = "instance crashed" # re-queued by the scheduler
+            worker.running = False
+
+    def log(self, idx, msg):
+        # Scheduler message about one instance: stdout and its log_callback
+        print(msg)
+        if self.log_callback:
+            self.log_callback(idx, msg)
+
+    def stop_automation(self, timeout=None):
+        # Cancels every wait and command of this run, then joins the threads
+        # for up to timeout seconds (stop_timeout by default). Nothing is
+        # launched after the token is cancelled.
         self.running = False
         self.start_time = None
-        # Signal workers to stop
-        for idx in self.active_workers:
-            if self.active_workers[idx]:
-                self.active_workers[idx].running = False
+        self.cancel_token.cancel()
+        if self.watchdog:
+            self.watchdog.stop()
+        self.events.put(("wake", None, None))
+
+        timeout = self.stop_timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+        threads = [self.thread, getattr(self, 'timer_thread', None), self.watchdog]
+        with self.lock:
+            threads += list(self.active_workers.values()) + list(self.boot_threads.values())
+        alive = []
+        for thread in threads:
+            if thread is None or thread is threading.current_thread() or not thread.is_alive():
+                continue
+            thread.join(max(0, deadline - time.time()))
+            if thread.is_alive():
+                alive.append(thread.name)
+        if alive:
+            print(f"Stop: {len(alive)} threads still finishing after {timeout}s: {alive}")
         
     def _timer_loop(self):
-        while self.running and self.start_time:
+        token = self.cancel_token
+        while self.running and self.start_time and not token.cancelled:
             delta = datetime.now() - self.start_time
             total_seconds = int(delta.total_seconds())
             hours, remainder = divmod(total_seconds, 3600)
@@ -143,57 +456,299 @@ class AutomationManager:
             
             if self.update_timer_callback:
                 self.update_timer_callback(time_str)
-            time.sleep(1)
+            token.wait(1)
             
+    def active_count(self):
+        with self.lock:
+            return len([job for job in self.jobs.values() if job.state in ACTIVE_STATES])
+
+    def booting_count(self):
+        with self.lock:
+            return len([job for job in self.jobs.values() if job.state == STATE_BOOTING])
+
+    def queued_indices(self):
+        with self.lock:
+            return [idx for idx, job in self.jobs.items() if job.state == STATE_QUEUED]
+
+    def launch_blocker(self):
+        # Why the next queued instance can't launch right now, None if it can
+        if self.active_count() >= self.max_active:
+            return f"All {self.max_active} slots busy"
+        allowed = self.boot_control.allowed()
+        if self.booting_count() >= allowed:
+            return f"{allowed} instances booting (boot limit)"
+        next_idx = self.pending.peek_ready(self.clock())
+        if next_idx is None:
+            return "Waiting for retry backoff"
+        if self.admission:
+            budget = self.controller.get_instance_budget(next_idx)
+            committed = [self.controller.get_instance_budget(job.index)
+                         for job in self.jobs.values() if job.state == STATE_BOOTING]
+            ok, reason = self.admission.check(budget, committed)
+            if not ok:
+                return reason
+        return None
+
+    def can_launch(self):
+        return self.launch_blocker() is None
+
+    def _set_paused_reason(self, reason):
+        reason = reason or ""
+        if reason != self.paused_reason:
+            self.paused_reason = reason
+            if reason:
+                print(f"Queue paused: {reason}")
+            if self.status_callback:
+                self.status_callback(reason)
+
+    def get_state_counts(self):
+        counts = {}
+        with self.lock:
+            for job in self.jobs.values():
+                counts[job.state] = counts.get(job.state, 0) + 1
+        return counts
+
     def _worker_loop(self):
-        queue = list(self.selected_instances)
-        print(f"Queue: {queue}")
+        # Event-driven scheduler. Each instance moves queued -> booting -> ready
+        # -> running -> done. Boot waits happen on per-instance watcher threads,
+        # so launches are only staggered by delay_between_start, and a slot is
+        # refilled as soon as a runner reports it has finished.
+        print(f"Queue: {list(self.pending)}")
         print(f"Settings: {self.task_settings}")
+        try:
+            self._schedule_loop()
+        except Exception as e:
+            # A scheduler bug must not leave a run that looks alive but launches nothing
+            traceback.print_exc()
+            self.stop_automation()
+            self._set_paused_reason(f"Stopped, scheduler error: {e}")
+            print("Automation loop ended.")
+            return
+        self._set_paused_reason(None)
+        print("Automation loop ended.")
 
-        while self.running:
-            # 1. Clean up dead workers
-            stopped_indices = []
-            for idx, worker in list(self.active_workers.items()):
-                if not worker.is_alive():
-                    # Worker finished
-                    stopped_indices.append(idx)
-                    # Check if instance is still running, maybe close it if not "shutdown" logic
-            
-            for idx in stopped_indices:
-                del self.active_workers[idx]
+    def _schedule_loop(self):
+        # Our own run's token, a later start_automation must not revive this loop
+        token = self.cancel_token
+        events = self.events
 
-            # 2. Check running count logic
-            # Get REAL running count from controller for safety
-            # But "Max Active" usually applies to how many WE control.
-            
-            current_count = len(self.active_workers)
-            
-            if current_count < self.max_active and queue:
-                next_in_line = queue.pop(0)
-                print(f"Launching instance {next_in_line}...")
-                
-                # Start LD
-                self.controller.start_instance(next_in_line)
-                
-                # Wait Boot
-                time.sleep(self.wait_after_boot)
-                
-                # Start Task Runner
-                if self.running:
-                    worker = DeviceTaskRunner(next_in_line, self.controller, self.task_settings, self.log_callback)
-                    worker.start()
-                    self.active_workers[next_in_line] = worker
-                    
-                    # Interval Delay
-                    if queue: # Only wait if more to come
-                        print(f"Waiting interval {self.delay_between_start}s...")
-                        time.sleep(self.delay_between_start)
-            
-            time.sleep(1)
-            
-            if not queue and not self.active_workers:
-                print("All tasks finished.")
+        while self.running and not token.cancelled:
+            with self.lock:
+                timeout = self.schedule_step()
+            if timeout is None:
+                print(f"All tasks finished. Completed: {self.completed_count}, failed: {self.failed_count}")
                 self.running = False
                 break
-        
-        print("Automation loop ended.")
+            if timeout == 0:
+                continue
+
+            # Sleep until the next launch/retry is due or an event arrives
+            try:
+                kind, idx, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            if token.cancelled:
+                break
+            with self.lock:
+                self._handle_event(kind, idx, payload)
+
+    def schedule_step(self):
+        # One scheduling decision at clock(), shared by _worker_loop and the
+        # fleet simulator. Returns 0 after launching an instance, None when
+        # every job has finished, otherwise how long to wait for an event
+        # before deciding again.
+        now = self.clock()
+        blocker = self.launch_blocker() if self.pending else None
+        self._set_paused_reason(blocker)
+        if self.cancel_token.cancelled:
+            return 0 # Stop was clicked while we were checking, the loop exits
+        if self.pending and blocker is None and now >= self.next_launch_at:
+            idx = self.pending.peek_ready(now)
+            self.pending.pop(idx)
+            self._launch(idx)
+            self.next_launch_at = now + self.delay_between_start
+            return 0
+
+        if not self.pending and self.active_count() == 0:
+            return None
+
+        timeout = self.idle_poll
+        if self.pending and blocker is None:
+            timeout = max(0.05, min(timeout, self.next_launch_at - now))
+        retry_at = self.pending.next_ready_time()
+        if retry_at and retry_at > now:
+            timeout = max(0.05, min(timeout, retry_at - now))
+        return timeout
+
+    def heartbeat_targets(self):
+        # Instances the watchdog should check: booted and handed to a runner
+        with self.lock:
+            return [job.index for job in self.jobs.values() if job.state == STATE_RUNNING]
+
+    def _launch(self, idx, reboot=False):
+        if self.cancel_token.cancelled:
+            return
+        job = self.jobs[idx]
+        job.state = STATE_BOOTING
+        job.launched_at = self.clock()
+        job.run_id += 1
+        self.log(idx, f"{'Rebooting' if reboot else 'Launching'} instance {idx}...")
+        self._start_boot(idx, reboot)
+
+    def _start_boot(self, idx, reboot=False):
+        # Boots on its own thread, the outcome comes back as an event
+        thread = threading.Thread(target=self._boot, args=(idx, reboot, self.cancel_token), daemon=True)
+        self.boot_threads[idx] = thread
+        thread.start()
+
+    def _boot(self, idx, reboot=False, token=None):
+        # Start the VM, then poll list2 EnterAndroid + sys.boot_completed instead of a fixed sleep
+        token = token or self.cancel_token
+        try:
+            with self.controller.cancel_scope(token):
+                if reboot:
+                    result = self.controller.reboot_instance(idx)
+                else:
+                    result = self.controller.start_instance(idx)
+                if result.timed_out or result.cancelled:
+                    self.events.put(("launch_failed", idx, result.describe()))
+                    return
+                ready = self.controller.wait_until_ready(idx, timeout=self.wait_after_boot, cancel=token)
+            if token.cancelled:
+                return # Stopped, nobody is waiting for the result
+            if not ready and not self._is_running(idx):
+                self.events.put(("launch_failed", idx, "instance did not start"))
+                return
+            self.events.put(("booted", idx, ready))
+        except Exception as e:
+            self.events.put(("launch_failed", idx, str(e)))
+
+    def _is_running(self, idx):
+        try:
+            instances = self.controller.list_instances()
+        except RuntimeError:
+            # list2 failed: the launch itself succeeded, so don't call it a failed launch
+            return True
+        inst = next((i for i in instances if i['index'] == str(idx)), None)
+        return bool(inst and inst['running'])
+
+    def _retry_or_fail(self, job, error):
+        job.attempts += 1
+        job.last_error = error
+        self.active_workers.pop(job.index, None)
+        if self.running and job.attempts <= self.max_retries:
+            delay = self.retry_backoff * (2 ** (job.attempts - 1))
+            job.state = STATE_QUEUED
+            self.pending.push(job.index, job.priority, self.clock() + delay)
+            self.log(job.index, f"Instance {job.index} failed ({error}), retry {job.attempts}/{self.max_retries} in {delay}s")
+        else:
+            job.state = STATE_FAILED
+            job.finished_at = self.clock()
+            self.failed_count += 1
+            self.log(job.index, f"Instance {job.index} failed ({error}), giving up after {job.attempts} attempts")
+
+    def _handle_event(self, kind, idx, payload):
+        job = self.jobs.get(idx)
+        if job is None:
+            return
+
+        if kind == "booted":
+            self.boot_threads.pop(idx, None)
+            job.state = STATE_READY
+            job.ready_at = self.clock()
+            boot_seconds = job.ready_at - job.launched_at
+            if payload:
+                self.log(idx, f"Instance {idx} ready after {boot_seconds:.1f}s")
+            else:
+                self.log(idx, f"Instance {idx} not ready after {self.wait_after_boot}s, starting tasks anyway")
+            self.boot_control.record(boot_seconds, ok=payload)
+            if job.removed:
+                job.state = STATE_DONE
+                job.finished_at = self.clock()
+                return
+            if self.running:
+                self.active_workers[idx] = self._start_runner(job)
+                job.state = STATE_RUNNING
+                self._check_ramp_up()
+
+        elif kind == "launch_failed":
+            self.boot_threads.pop(idx, None)
+            self.boot_control.record(self.clock() - job.launched_at, ok=False)
+            if job.removed:
+                job.state = STATE_DONE
+                return
+            self._retry_or_fail(job, payload)
+
+        elif kind == "hung":
+            self._handle_hung(job, payload)
+
+        elif kind == "finished":
+            payload, run_id = payload
+            if run_id != job.run_id or job.state != STATE_RUNNING:
+                return # Runner of an earlier attempt, or the watchdog already dealt with it
+            if payload is not None and not job.removed:
+                # Runner hit an exception, stop the VM and try again later
+                self._stop_vm(idx)
+                self._retry_or_fail(job, payload)
+                return
+            job.state = STATE_DONE
+            job.finished_at = self.clock()
+            self.completed_count += 1
+            self.active_workers.pop(idx, None)
+
+    def _stop_vm(self, idx):
+        # dnconsole quit on its own thread: it can take up to its timeout,
+        # and the scheduler (holding self.lock) must never wait on dnconsole.
+        # Killed like boot commands when the run is stopped.
+        token = self.cancel_token
+
+        def stop():
+            try:
+                with self.controller.cancel_scope(token):
+                    self.controller.stop_instance(idx)
+            except Exception as e:
+                self.log(idx, f"Could not stop instance {idx}: {e}")
+
+        threading.Thread(target=stop, daemon=True).start()
+
+    def _start_runner(self, job):
+        # Runs the tasks on a DeviceTaskRunner thread, it reports back with a "finished" event
+        worker = DeviceTaskRunner(job.index, self.controller, self.task_settings, self.log_callback,
+                                  on_finished=lambda i, error, run_id=job.run_id: self.events.put(("finished", i, (error, run_id))),
+                                  cancel_token=self.cancel_token)
+        worker.start()
+        return worker
+
+    def _handle_hung(self, job, reason):
+        if job.state != STATE_RUNNING:
+            return
+        idx = job.index
+        worker = self.active_workers.pop(idx, None)
+        if worker:
+            worker.running = False
+
+        job.breaker.record_failure(self.clock())
+        if job.breaker.is_open(self.clock()) or not self.running:
+            # Keeps hanging, stop wasting a slot on it
+            self.log(idx, f"Instance {idx} hung ({reason}), circuit open after {len(job.breaker.failures)} hangs, giving up")
+            self._stop_vm(idx)
+            job.state = STATE_FAILED
+            job.last_error = f"hung: {reason}"
+            job.finished_at = self.clock()
+            self.failed_count += 1
+            return
+
+        self.log(idx, f"Instance {idx} hung ({reason}), rebooting")
+        self._launch(idx, reboot=True)
+
+    def _check_ramp_up(self):
+        # Logged once: as many instances as there are slots (or all of them,
+        # if fewer) have booted and started their tasks
+        if self.ramp_up_seconds is not None:
+            return
+        target = min(self.max_active, len(self.jobs))
+        running = len([job for job in self.jobs.values() if job.ready_at is not None])
+        if running >= target:
+            self.ramp_up_seconds = self.clock() - self.started_at
+            print(f"Fleet ramp-up: {running} instances running after {self.ramp_up_seconds:.1f}s "
+                  f"(boot concurrency {self.boot_control.allowed()}, interval {self.delay_between_start}s)")
@@ -0,0 +1,53 @@
+# Commands per second for adb_tap through "dnconsole adb" (one process per
+# command) versus the pooled persistent adb shell.
+#
+#   python bench/bench_adb_pool.py --instances 4 --commands 50
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ld_controller import LDPlayerController
+from fake_ldplayer import make_fake_install
+
+
+def run(controller, instances, commands):
+    def drive(index):
+        for i in range(commands):
+            controller.adb_tap(index, 100 + i, 200)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=instances) as pool:
+        list(pool.map(drive, range(instances)))
+    elapsed = time.perf_counter() - start
+    return instances * commands / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instances", type=int, default=4)
+    parser.add_argument("--commands", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        console_path, adb_path = make_fake_install(tmp)
+
+        before = LDPlayerController(console_path, adb_path, use_adb_pool=False)
+        cps_before = run(before, args.instances, args.commands)
+
+        after = LDPlayerController(console_path, adb_path)
+        cps_after = run(after, args.instances, args.commands)
+        after.adb_pool.close_all()
+
+    print(f"instances={args.instances} commands/instance={args.commands}")
+    print(f"dnconsole adb (before): {cps_before:8.1f} cmd/s")
+    print(f"pooled adb shell (after): {cps_after:8.1f} cmd/s")
+    print(f"speedup: {cps_after / cps_before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# End-to-end benchmarks on the simulated backend (sim_controller.py):
+#   ramp-up    - AutomationManager run over N instances: time until all slots
+#                are running, total run time, scheduler CPU per instance
+#   commands   - controller commands per second (list2 and adb, in-process)
+#   process    - the same through the fake dnconsole/adb executables
+#
+#   python bench/bench_fleet.py                      # 10, 100 and 500 instances
+#   python bench/bench_fleet.py --sizes 100 --boot normal:5,1 --latency-ms 50
+#
+# Boot times are scaled down (a few seconds instead of ~30) so a run fits in
+# a benchmark; pass --boot to change the distribution.
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from automation_manager import AutomationManager
+from ld_controller import LDPlayerController
+from fake_ldplayer import FakeLDPlayer, make_fake_install
+from sim_controller import SimulatedController
+
+
+def bench_ramp_up(size, args):
+    fleet = FakeLDPlayer(instances=size, boot_time=args.boot, latency=args.latency_ms / 1000.0,
+                         launch_fail_rate=args.launch_fail, boot_hang_rate=args.boot_hang, seed=1)
+    controller = SimulatedController(fleet)
+    manager = AutomationManager(controller, None)
+    manager.retry_backoff = 1
+
+    max_active = args.max_active or size
+    # The scheduler prints a line per launch/boot, keep them out of the report
+    out = sys.stdout if args.verbose else io.StringIO()
+    with contextlib.redirect_stdout(out):
+        cpu_start = time.process_time()
+        start = time.time()
+        manager.start_automation([str(i) for i in range(size)], max_active, interval_delay=0,
+                                 boot_delay=args.boot_timeout, min_boots=args.min_boots, max_boots=max_active)
+        deadline = start + args.run_timeout
+        while manager.running and time.time() < deadline:
+            time.sleep(0.05)
+        elapsed = time.time() - start
+        cpu = time.process_time() - cpu_start
+        timed_out = manager.running
+        manager.stop_automation()
+
+    snap = controller.metrics.snapshot()
+    return {
+        'size': size,
+        'ramp_up': manager.ramp_up_seconds,
+        'elapsed': elapsed,
+        'completed': manager.completed_count,
+        'failed': manager.failed_count,
+        'commands': sum(op['count'] for op in snap['operations'].values()),
+        'cpu_ms_per_instance': cpu * 1000.0 / size,
+        'cpu_percent': 100.0 * cpu / elapsed if elapsed else 0.0,
+        'timed_out': timed_out,
+    }
+
+
+def drive_commands(controller, size, count, threads):
+    def one(i):
+        index = i % size
+        if i % 4 == 0:
+            controller.list_instances(force=True)
+        else:
+            controller.adb_tap(index, 100, 200)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(count)))
+    return count / (time.perf_counter() - start)
+
+
+def bench_commands(size, args):
+    fleet = FakeLDPlayer(instances=size, running=True, latency=args.latency_ms / 1000.0)
+    return drive_commands(SimulatedController(fleet), size, args.commands, args.threads)
+
+
+def bench_process(size, args):
+    # Real subprocess per command, like dnconsole.exe; kept small, it's slow
+    with tempfile.TemporaryDirectory() as tmp:
+        console_path, adb_path = make_fake_install(tmp, instances=size, latency_ms=args.latency_ms)
+        controller = LDPlayerController(console_path, adb_path, use_adb_pool=False)
+        return drive_commands(controller, size, min(args.commands, args.process_commands), args.threads)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,100,500", help="comma separated instance counts")
+    parser.add_argument("--boot", default="normal:2,0.5", help="boot time distribution, see fake_ldplayer.parse_distribution")
+    parser.add_argument("--latency-ms", type=float, default=0, help="added to every simulated command")
+    parser.add_argument("--launch-fail", type=float, default=0, help="probability a launch fails")
+    parser.add_argument("--boot-hang", type=float, default=0, help="probability a VM never finishes booting")
+    parser.add_argument("--max-active", type=int, default=0, help="slots (default: all instances)")
+    parser.add_argument("--min-boots", type=int, default=1, help="starting/minimum parallel boots (the app uses 1)")
+    parser.add_argument("--boot-timeout", type=int, default=10)
+    parser.add_argument("--run-timeout", type=float, default=120)
+    parser.add_argument("--commands", type=int, default=5000)
+    parser.add_argument("--process-commands", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--skip-process", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="show the scheduler's output")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    print(f"boot={args.boot} latency={args.latency_ms}ms launch_fail={args.launch_fail} boot_hang={args.boot_hang}")
+    print()
+    print(f"{'instances':>9} {'ramp-up':>9} {'total':>8} {'done':>6} {'failed':>6} {'commands':>9} {'sched cpu/inst':>15} {'cpu':>6}")
+    for size in sizes:
+        r = bench_ramp_up(size, args)
+        ramp = f"{r['ramp_up']:.1f}s" if r['ramp_up'] is not None else "-"
+        total = f"{r['elapsed']:.1f}s" + ("!" if r['timed_out'] else "")
+        print(f"{size:>9} {ramp:>9} {total:>8} {r['completed']:>6} {r['failed']:>6} {r['commands']:>9} "
+              f"{r['cpu_ms_per_instance']:>12.2f} ms {r['cpu_percent']:>5.1f}%")
+
+    print()
+    print(f"{'instances':>9} {'in-process cmd/s':>17}" + ("" if args.skip_process else f" {'process cmd/s':>14}"))
+    for size in sizes:
+        line = f"{size:>9} {bench_commands(size, args):>17.0f}"
+        if not args.skip_process:
+            line += f" {bench_process(size, args):>14.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
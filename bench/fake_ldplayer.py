@@ -0,0 +1,335 @@
+# Stand-in for dnconsole.exe / adb.exe so the controller can be exercised
+# without an LDPlayer install. FakeLDPlayer is the simulated fleet; it is used
+# in-process by sim_controller.SimulatedController, or as a command line tool
+# through the launchers written by make_fake_install().
+#
+#   python fake_ldplayer.py dnconsole list2
+#   python fake_ldplayer.py adb -s emulator-5554 shell
+#
+# Command line settings come from the environment:
+#   FAKE_LD_INSTANCES      instances in a new fleet (default 4)
+#   FAKE_LD_LATENCY_MS     delay added to every command (default 0)
+#   FAKE_LD_BOOT           boot time distribution, see parse_distribution (default "fixed:0")
+#   FAKE_LD_LAUNCH_FAIL    probability a launch fails (default 0)
+#   FAKE_LD_BOOT_HANG      probability a launched VM never finishes booting (default 0)
+#   FAKE_LD_COMMAND_HANG   probability a command never returns (default 0)
+#   FAKE_LD_STATE          JSON file holding the fleet between invocations;
+#                          without it every call sees a fresh, running fleet
+import json
+import math
+import os
+import random
+import stat
+import sys
+import time
+
+HANG = float("inf")
+
+
+def parse_distribution(spec):
+    # "fixed:30", "uniform:20,40", "normal:30,5" or "lognormal:30,0.3"
+    # (median, sigma) -> callable(rng) returning seconds, never negative
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()] or [0.0]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(max(values[0], 1e-6)), values[1])
+    raise ValueError(f"Unknown distribution: {spec}")
+
+
+class FakeLDPlayer:
+    # Simulated LDPlayer fleet. Each instance has a run state, a boot
+    # deadline after which Android reports ready, hardware settings and the
+    # package in the foreground. handle() answers one dnconsole command line,
+    # command_delay() says how long that command should take (HANG = never).
+    def __init__(self, instances=4, boot_time="fixed:0", latency=0.0, launch_fail_rate=0.0,
+                 boot_hang_rate=0.0, command_hang_rate=0.0, running=False, seed=None, clock=time.time):
+        self.boot_time = parse_distribution(boot_time) if isinstance(boot_time, str) else boot_time
+        self.latency = latency
+        self.launch_fail_rate = launch_fail_rate
+        self.boot_hang_rate = boot_hang_rate
+        self.command_hang_rate = command_hang_rate
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.instances = {} # index -> state dict
+        for i in range(instances):
+            self._add(f"LDPlayer-{i}")
+            if running:
+                self.instances[i].update(running=True, ready_at=0)
+        self.counts = {} # command -> calls, for benchmarks
+
+    # ---------- state ----------
+    def _add(self, name):
+        index = max(self.instances) + 1 if self.instances else 0
+        self.instances[index] = {
+            'name': name, 'running': False, 'ready_at': None, 'cpu': 2, 'memory': 2048,
+            'resolution': "720,1280,320", 'foreground': None
+        }
+        return index
+
+    def to_dict(self):
+        return {str(i): dict(inst) for i, inst in self.instances.items()}
+
+    def load(self, data):
+        self.instances = {int(i): dict(inst) for i, inst in data.items()}
+
+    def is_android(self, inst):
+        return inst['running'] and inst['ready_at'] is not None and self.clock() >= inst['ready_at']
+
+    def _boot(self, inst):
+        inst['running'] = True
+        inst['foreground'] = None
+        if self.rng.random() < self.boot_hang_rate:
+            inst['ready_at'] = None # stuck on the boot screen
+        else:
+            inst['ready_at'] = self.clock() + self.boot_time(self.rng)
+
+    def _stop(self, inst):
+        inst.update(running=False, ready_at=None, foreground=None)
+
+    # ---------- commands ----------
+    def command_delay(self, args):
+        if self.command_hang_rate and self.rng.random() < self.command_hang_rate:
+            return HANG
+        return self.latency
+
+    def handle(self, args):
+        # Returns (returncode, stdout) for one dnconsole call
+        if not args:
+            return 1, ""
+        op = args[0]
+        self.counts[op] = self.counts.get(op, 0) + 1
+        opts = {args[i]: args[i + 1] for i in range(1, len(args) - 1) if args[i].startswith("--")}
+        inst = None
+        if "--index" in opts:
+            inst = self.instances.get(int(opts["--index"]))
+            if inst is None:
+                return 1, "instance not found"
+
+        if op == "list2":
+            lines = []
+            for i, s in sorted(self.instances.items()):
+                if s['running']:
+                    android = 1 if self.is_android(s) else 0
+                    lines.append(f"{i},{s['name']},{i + 100},{i + 200},{android},{1000 + i},{2000 + i},0")
+                else:
+                    lines.append(f"{i},{s['name']},0,0,0,-1,-1,0")
+            return 0, "\n".join(lines)
+        if op == "launch":
+            if inst['running']:
+                return 0, ""
+            if self.rng.random() < self.launch_fail_rate:
+                return 1, "launch failed"
+            self._boot(inst)
+            return 0, ""
+        if op == "reboot":
+            self._boot(inst)
+            return 0, ""
+        if op == "quit":
+            self._stop(inst)
+            return 0, ""
+        if op == "quitall":
+            for s in self.instances.values():
+                self._stop(s)
+            return 0, ""
+        if op == "modify":
+            for key in ("cpu", "memory"):
+                if f"--{key}" in opts:
+                    inst[key] = int(opts[f"--{key}"])
+            if "--resolution" in opts:
+                inst['resolution'] = opts["--resolution"]
+            return 0, ""
+        if op == "add":
+            self._add(opts.get("--name", "LDPlayer"))
+            return 0, ""
+        if op == "copy":
+            source = self.instances.get(int(opts.get("--from", 0)))
+            index = self._add(opts.get("--name", "LDPlayer"))
+            if source:
+                self.instances[index].update(cpu=source['cpu'], memory=source['memory'], resolution=source['resolution'])
+            return 0, ""
+        if op == "remove":
+            self.instances.pop(int(opts["--index"]), None)
+            return 0, ""
+        if op == "rename":
+            inst['name'] = opts.get("--title", inst['name'])
+            return 0, ""
+        if op == "adb":
+            return self.shell(int(opts["--index"]), opts.get("--command", ""))
+        if op == "sortWnd":
+            return 0, ""
+        return 1, f"unknown command {op}"
+
+    def shell(self, index, cmd):
+        # One "adb shell" line for an instance: returns (status, output)
+        inst = self.instances.get(index)
+        if inst is None or not inst['running'] or inst['ready_at'] is None:
+            return 1, "error: device offline"
+        status, out = 0, []
+        for part in cmd.strip().strip('"').split(";"):
+            part = part.strip()
+            if not part:
+                continue
+            if part.startswith("echo"):
+                out.append(part[4:].strip().replace("$?", str(status)))
+            elif part.startswith("getprop sys.boot_completed"):
+                out.append("1" if self.is_android(inst) else "")
+            elif part.startswith("monkey -p"):
+                inst['foreground'] = part.split()[2]
+            elif part.startswith("am force-stop"):
+                if inst['foreground'] == part.split()[2]:
+                    inst['foreground'] = None
+            elif part.startswith("dumpsys window"):
+                if inst['foreground']:
+                    out.append(f"  mCurrentFocus=Window{{1a2b u0 {inst['foreground']}/.MainActivity}}")
+            elif part.startswith("sleep"):
+                pass # batched input, timing doesn't matter here
+            status = 0
+        return status, "\n".join(o for o in out if o)
+
+
+# ---------- command line tool ----------
+
+def fleet_from_env():
+    return FakeLDPlayer(
+        instances=int(os.environ.get("FAKE_LD_INSTANCES", "4")),
+        boot_time=os.environ.get("FAKE_LD_BOOT", "fixed:0"),
+        latency=float(os.environ.get("FAKE_LD_LATENCY_MS", "0")) / 1000.0,
+        launch_fail_rate=float(os.environ.get("FAKE_LD_LAUNCH_FAIL", "0")),
+        boot_hang_rate=float(os.environ.get("FAKE_LD_BOOT_HANG", "0")),
+        command_hang_rate=float(os.environ.get("FAKE_LD_COMMAND_HANG", "0")),
+        running=not os.environ.get("FAKE_LD_STATE"), # stateless: everything is up
+    )
+
+
+class StateFile:
+    # The fleet shared by all fake processes, guarded by a lock directory
+    # (mkdir is atomic on every platform)
+    def __init__(self, path):
+        self.path = path
+        self.lock_dir = path + ".lock"
+
+    def __enter__(self):
+        deadline = time.time() + 10
+        while True:
+            try:
+                os.mkdir(self.lock_dir)
+                return self
+            except FileExistsError:
+                if time.time() > deadline:
+                    os.rmdir(self.lock_dir) # left behind by a killed process
+                time.sleep(0.005)
+
+    def __exit__(self, *exc):
+        try:
+            os.rmdir(self.lock_dir)
+        except OSError:
+            pass
+        return False
+
+    def read(self, fleet):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                fleet.load(json.load(f))
+
+    def write(self, fleet):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(fleet.to_dict(), f)
+        os.replace(tmp, self.path)
+
+
+def run_with_state(fleet, func):
+    path = os.environ.get("FAKE_LD_STATE")
+    if not path:
+        return func()
+    state = StateFile(path)
+    with state:
+        state.read(fleet)
+        result = func()
+        state.write(fleet)
+    return result
+
+
+def run_dnconsole(args):
+    fleet = fleet_from_env()
+    delay = fleet.command_delay(args)
+    if delay == HANG:
+        while True:
+            time.sleep(60)
+    if delay:
+        time.sleep(delay)
+    code, out = run_with_state(fleet, lambda: fleet.handle(args))
+    if out:
+        print(out)
+    return code
+
+
+def run_adb(args):
+    if "shell" not in args:
+        return 0
+    fleet = fleet_from_env()
+    serial = args[args.index("-s") + 1] if "-s" in args else "emulator-5554"
+    index = (int(serial.rsplit("-", 1)[-1]) - 5554) // 2
+    rest = args[args.index("shell") + 1:]
+    if rest:
+        code, out = run_with_state(fleet, lambda: fleet.shell(index, " ".join(rest)))
+        if out:
+            print(out)
+        return code
+
+    # Interactive shell over stdin: commands are separated by ';'
+    for line in sys.stdin:
+        line = line.strip()
+        if line == "exit":
+            break
+        if fleet.latency:
+            time.sleep(fleet.latency)
+        code, out = run_with_state(fleet, lambda: fleet.shell(index, line))
+        if code and out.startswith("error:"):
+            # Like adb: the device went away, the shell session ends
+            print(out, flush=True)
+            return code
+        if out:
+            print(out, flush=True)
+    return 0
+
+
+def make_fake_install(directory, **env):
+    # Writes dnconsole/adb launchers into directory, returns (console_path, adb_path).
+    # Keyword arguments become FAKE_LD_* settings baked into the launchers,
+    # e.g. make_fake_install(tmp, instances=10, boot="normal:3,1", state=True)
+    script = os.path.abspath(__file__)
+    settings = {}
+    for key, value in env.items():
+        if key == "state" and value is True:
+            value = os.path.join(directory, "fleet.json")
+        settings[f"FAKE_LD_{key.upper()}"] = str(value)
+
+    paths = []
+    for tool in ("dnconsole", "adb"):
+        if os.name == "nt":
+            path = os.path.join(directory, f"{tool}.bat")
+            exports = "".join(f'@set "{k}={v}"\n' for k, v in settings.items())
+            with open(path, "w") as f:
+                f.write(f'{exports}@"{sys.executable}" "{script}" {tool} %*\n')
+        else:
+            path = os.path.join(directory, tool)
+            exports = "".join(f"export {k}='{v}'\n" for k, v in settings.items())
+            with open(path, "w") as f:
+                f.write(f'#!/bin/sh\n{exports}exec "{sys.executable}" "{script}" {tool} "$@"\n')
+            os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        paths.append(path)
+    return paths[0], paths[1]
+
+
+if __name__ == "__main__":
+    tool = sys.argv[1] if len(sys.argv) > 1 else "dnconsole"
+    if tool == "adb":
+        sys.exit(run_adb(sys.argv[2:]))
+    sys.exit(run_dnconsole(sys.argv[2:]))
@@ -0,0 +1,316 @@
+# Discrete-event simulator for choosing max_active, delay_between_start and
+# wait_after_boot. It runs the real AutomationManager scheduling code
+# (schedule_step, _handle_event, BootConcurrency, retries) on a virtual
+# clock, with modeled boot and task durations instead of VMs, so a run that
+# takes hours on a real host finishes in milliseconds.
+#
+#   python bench/fleet_sim.py --instances 200 --max-active 20 --interval 10 --boot-wait 90
+#   python bench/fleet_sim.py --instances 200 --sweep
+#
+# The model:
+#   - a boot takes --boot seconds, slowed by --contention for every other VM
+#     booting at the same time, and by the host being over --capacity
+#   - readiness is seen at the next probe of wait_until_ready (1s backing
+#     off x1.5 up to 5s), or not at all if that is after wait_after_boot;
+#     tasks started on a VM that isn't up yet fail and the job is retried
+#   - tasks take --task seconds, slowed when more than --capacity run
+#   - --launch-fail / --task-fail are per-attempt failure probabilities
+# Hangs and the watchdog are not modeled.
+import argparse
+import contextlib
+import heapq
+import io
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from automation_manager import AutomationManager, STATE_BOOTING, ACTIVE_STATES
+from fake_ldplayer import parse_distribution
+
+INF = float("inf")
+
+
+class FleetModel:
+    def __init__(self, boot_time="lognormal:35,0.25", task_time="uniform:600,900", contention=0.1,
+                 capacity=None, launch_fail_rate=0.0, task_fail_rate=0.0, probe_initial=1.0,
+                 probe_max=5.0, seed=None):
+        self.boot_time = parse_distribution(boot_time)
+        self.task_time = parse_distribution(task_time)
+        self.contention = contention # extra boot time per other concurrent boot
+        self.capacity = capacity # instances the host runs at full speed (None = unlimited)
+        self.launch_fail_rate = launch_fail_rate
+        self.task_fail_rate = task_fail_rate
+        self.probe_initial = probe_initial
+        self.probe_max = probe_max
+        self.rng = random.Random(seed)
+
+    def slowdown(self, active):
+        if not self.capacity or active <= self.capacity:
+            return 1.0
+        return active / float(self.capacity)
+
+    def detect_time(self, boot_seconds, timeout):
+        # When wait_until_ready notices a boot that takes boot_seconds
+        t, delay = 0.0, self.probe_initial
+        while t < boot_seconds:
+            t += delay
+            delay = min(delay * 1.5, self.probe_max)
+        return t if t <= timeout else None
+
+
+class SimRunner:
+    # What the scheduler keeps in active_workers; the simulator ends it
+    def __init__(self):
+        self.running = True
+        self.error = None
+
+
+class SimController:
+    # The parts of LDPlayerController the scheduler calls itself
+    def __init__(self):
+        self.default_budget = {'cpu': 2, 'memory': 2048}
+
+    def get_instance_budget(self, index):
+        return self.default_budget
+
+    def stop_instance(self, index):
+        pass
+
+
+class SimulatedAutomationManager(AutomationManager):
+    # AutomationManager whose boots and task runners are events on the
+    # simulator's queue instead of threads
+    def __init__(self, sim):
+        super().__init__(SimController(), None)
+        self.sim = sim
+        self.clock = lambda: sim.now
+        self.idle_poll = INF # nothing changes between events, no need to poll
+        self.watchdog_enabled = False
+
+    def _start_boot(self, idx, reboot=False):
+        self.sim.start_boot(self.jobs[idx])
+
+    def _start_runner(self, job):
+        return self.sim.start_tasks(job)
+
+    def _stop_vm(self, idx):
+        pass
+
+    def log(self, idx, msg):
+        pass
+
+
+class FleetSimulator:
+    def __init__(self, model, instances, max_active, interval_delay=40, boot_delay=60,
+                 min_boots=1, max_boots=None, max_time=7 * 24 * 3600):
+        self.model = model
+        self.instances = instances
+        self.settings = dict(max_active=max_active, interval_delay=interval_delay, boot_delay=boot_delay,
+                             min_boots=min_boots, max_boots=max_boots)
+        self.max_time = max_time
+        self.now = 0.0
+        self.queue = [] # (time, seq, kind, index, payload)
+        self.counter = itertools.count()
+        self.vm_ready_at = {} # index -> when the current boot really completes
+        self.manager = SimulatedAutomationManager(self)
+
+        # Accounting
+        self.active = 0
+        self.booting = 0
+        self.slot_seconds = 0.0 # integral of instances holding a slot
+        self.boot_seconds = 0.0 # integral of instances booting
+        self.peak_boots = 0
+        self.launches = 0
+
+    # ---------- model hooks ----------
+    def post(self, delay, kind, index, payload):
+        heapq.heappush(self.queue, (self.now + delay, next(self.counter), kind, index, payload))
+
+    def start_boot(self, job):
+        self.launches += 1
+        model = self.model
+        if model.rng.random() < model.launch_fail_rate:
+            self.post(5.0, "launch_failed", job.index, "launch failed")
+            return
+        # job is already counted as booting
+        booting = self.manager.booting_count()
+        duration = model.boot_time(model.rng) * (1 + model.contention * max(0, booting - 1))
+        duration *= model.slowdown(self.manager.active_count())
+        self.vm_ready_at[job.index] = self.now + duration
+        seen = model.detect_time(duration, self.manager.wait_after_boot)
+        if seen is None:
+            self.post(self.manager.wait_after_boot, "booted", job.index, False)
+        else:
+            self.post(seen, "booted", job.index, True)
+
+    def start_tasks(self, job):
+        model = self.model
+        runner = SimRunner()
+        ready_at = self.vm_ready_at.get(job.index, self.now)
+        if ready_at > self.now:
+            # Started on a VM that wasn't up: adb fails, the attempt is wasted
+            self.post(ready_at - self.now, "finished", job.index, ("instance not ready", job.run_id))
+            return runner
+        duration = model.task_time(model.rng) * model.slowdown(self.manager.active_count())
+        error = "task failed" if model.rng.random() < model.task_fail_rate else None
+        self.post(duration, "finished", job.index, (error, job.run_id))
+        return runner
+
+    # ---------- main loop ----------
+    def advance(self, t):
+        dt = t - self.now
+        self.slot_seconds += self.active * dt
+        self.boot_seconds += self.booting * dt
+        self.now = t
+
+    def count(self):
+        jobs = self.manager.jobs.values()
+        self.active = len([j for j in jobs if j.state in ACTIVE_STATES])
+        self.booting = len([j for j in jobs if j.state == STATE_BOOTING])
+        self.peak_boots = max(self.peak_boots, self.booting)
+
+    def run(self):
+        s = self.settings
+        m = self.manager
+        wall = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            m.configure_run([str(i) for i in range(self.instances)], s['max_active'], s['interval_delay'],
+                            s['boot_delay'], min_boots=s['min_boots'], max_boots=s['max_boots'])
+            stalled = False
+            while self.now < self.max_time:
+                timeout = m.schedule_step()
+                self.count()
+                if timeout is None:
+                    break
+                if timeout == 0:
+                    continue
+                if self.queue and self.queue[0][0] <= self.now + timeout:
+                    t, _, kind, idx, payload = heapq.heappop(self.queue)
+                    self.advance(t)
+                    m._handle_event(kind, idx, payload)
+                    self.count()
+                elif timeout == INF:
+                    stalled = True # nothing left that could unblock the queue
+                    break
+                else:
+                    self.advance(self.now + timeout)
+
+        total = self.now
+        return {
+            'settings': dict(s),
+            'total_seconds': total,
+            'completed': m.completed_count,
+            'failed': m.failed_count,
+            'unfinished': self.instances - m.completed_count - m.failed_count,
+            'launches': self.launches,
+            'utilization': self.slot_seconds / (s['max_active'] * total) if total else 0.0,
+            'boot_share': self.boot_seconds / self.slot_seconds if self.slot_seconds else 0.0,
+            'peak_boots': self.peak_boots,
+            'ramp_up_seconds': m.ramp_up_seconds,
+            'stalled': stalled,
+            'wall_ms': (time.perf_counter() - wall) * 1000,
+        }
+
+
+def simulate(instances, max_active, interval_delay, boot_delay, model_args, seeds=(1,), **kwargs):
+    # Averages total_seconds/utilization over seeds, returns the report of the first seed with them
+    reports = []
+    for seed in seeds:
+        model = FleetModel(seed=seed, **model_args)
+        reports.append(FleetSimulator(model, instances, max_active, interval_delay, boot_delay, **kwargs).run())
+    report = dict(reports[0])
+    for key in ('total_seconds', 'utilization', 'boot_share', 'launches', 'wall_ms'):
+        report[key] = sum(r[key] for r in reports) / len(reports)
+    report['peak_boots'] = max(r['peak_boots'] for r in reports)
+    report['failed'] = max(r['failed'] for r in reports)
+    report['unfinished'] = max(r['unfinished'] for r in reports)
+    return report
+
+
+def sweep(instances, model_args, max_active_values, interval_values, boot_wait_values, seeds, max_boots=None):
+    # Every combination; the recommendation is the fastest one that finishes
+    # everything, preferring fewer slots and fewer simultaneous boots when
+    # completion times are within 2% of each other
+    results = []
+    for max_active in max_active_values:
+        for interval in interval_values:
+            for boot_wait in boot_wait_values:
+                results.append(simulate(instances, max_active, interval, boot_wait, model_args, seeds,
+                                        max_boots=max_boots))
+    ok = [r for r in results if not r['unfinished'] and not r['failed']] or results
+    best_time = min(r['total_seconds'] for r in ok)
+    near = [r for r in ok if r['total_seconds'] <= best_time * 1.02]
+    best = min(near, key=lambda r: (r['settings']['max_active'], r['peak_boots'], r['total_seconds']))
+    return best, sorted(results, key=lambda r: r['total_seconds'])
+
+
+def format_row(r):
+    s = r['settings']
+    return (f"{s['max_active']:>6} {s['interval_delay']:>8} {s['boot_delay']:>9} "
+            f"{r['total_seconds'] / 60:>9.1f} {100 * r['utilization']:>6.1f}% {100 * r['boot_share']:>6.1f}% "
+            f"{r['peak_boots']:>5} {r['launches']:>8.0f} {r['failed']:>6} {r['wall_ms']:>8.1f}")
+
+
+HEADER = f"{'slots':>6} {'interval':>8} {'boot wait':>9} {'total min':>9} {'util':>7} {'boot':>7} {'peak':>5} {'launches':>8} {'failed':>6} {'wall ms':>8}"
+
+
+def int_list(text):
+    return [int(v) for v in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instances", type=int, default=100)
+    parser.add_argument("--max-active", type=int, default=10)
+    parser.add_argument("--interval", type=int, default=40, help="delay_between_start, seconds")
+    parser.add_argument("--boot-wait", type=int, default=60, help="wait_after_boot, seconds")
+    parser.add_argument("--min-boots", type=int, default=1)
+    parser.add_argument("--max-boots", type=int, default=None)
+    parser.add_argument("--boot", default="lognormal:35,0.25", help="boot time distribution, see fake_ldplayer.parse_distribution")
+    parser.add_argument("--task", default="uniform:600,900", help="task time distribution")
+    parser.add_argument("--contention", type=float, default=0.1, help="boot slowdown per other concurrent boot")
+    parser.add_argument("--capacity", type=int, default=None, help="instances the host runs at full speed")
+    parser.add_argument("--launch-fail", type=float, default=0.0)
+    parser.add_argument("--task-fail", type=float, default=0.0)
+    parser.add_argument("--seeds", type=int, default=3, help="runs averaged per setting")
+    parser.add_argument("--sweep", action="store_true", help="try combinations and recommend one")
+    parser.add_argument("--max-active-range", type=int_list, default=[5, 10, 15, 20, 30, 40])
+    parser.add_argument("--interval-range", type=int_list, default=[0, 5, 10, 20, 40])
+    parser.add_argument("--boot-wait-range", type=int_list, default=[45, 60, 90, 120])
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    model_args = dict(boot_time=args.boot, task_time=args.task, contention=args.contention, capacity=args.capacity,
+                      launch_fail_rate=args.launch_fail, task_fail_rate=args.task_fail)
+    seeds = range(1, args.seeds + 1)
+    print(f"{args.instances} instances, boot={args.boot} task={args.task} contention={args.contention} capacity={args.capacity}")
+    print()
+
+    if not args.sweep:
+        r = simulate(args.instances, args.max_active, args.interval, args.boot_wait, model_args, seeds,
+                     min_boots=args.min_boots, max_boots=args.max_boots)
+        print(HEADER)
+        print(format_row(r))
+        if r['ramp_up_seconds'] is not None:
+            print(f"\nramp-up {r['ramp_up_seconds']:.0f}s, {r['completed']} completed, {r['unfinished']} unfinished")
+        return
+
+    start = time.perf_counter()
+    best, results = sweep(args.instances, model_args, args.max_active_range, args.interval_range,
+                          args.boot_wait_range, seeds, args.max_boots)
+    print(HEADER)
+    for r in results[:args.top]:
+        print(format_row(r))
+    s = best['settings']
+    print(f"\n{len(results)} settings in {time.perf_counter() - start:.1f}s")
+    print(f"Recommended: max_active={s['max_active']} interval_delay={s['interval_delay']} "
+          f"boot_delay={s['boot_delay']} -> {best['total_seconds'] / 60:.1f} min, "
+          f"{100 * best['utilization']:.0f}% slot utilization, peak {best['peak_boots']} boots")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# LDPlayerController that answers from a recorded trace instead of running
+# dnconsole.exe (record one with controller.start_trace(path), or set
+# TRACE_FILE in ui.py). Each distinct command line gets its recorded
+# responses back in the order they were recorded; once they run out the last
+# one keeps being returned, so polling loops settle on the final state.
+# Commands the trace never saw fail with returncode 1 and are counted in
+# unmatched. Replays are deterministic, and calls can be compared with the
+# trace to spot regressions such as extra list2 calls:
+#
+#   controller = ReplayController("logs/commands.trace.gz")
+#   ... drive the scheduler / UI refresh code ...
+#   print(controller.compare())
+#
+#   python bench/replay_controller.py logs/commands.trace.gz    # trace summary
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ld_controller import LDPlayerController
+from command_runner import CommandResult
+from command_trace import read_trace, trace_counts
+
+
+class ReplayController(LDPlayerController):
+    # speed: None answers at once, 1.0 takes as long as the recorded
+    # command did, 2.0 half as long, ...
+    def __init__(self, trace, speed=None, inventory_ttl=1.5):
+        entries = list(read_trace(trace)) if isinstance(trace, str) else list(trace)
+        self.entries = entries
+        self.responses = {} # command line -> deque of recorded entries
+        for entry in entries:
+            self.responses.setdefault(tuple(entry['a']), deque()).append(entry)
+        self.speed = speed
+        self.replay_lock = threading.Lock()
+        self.calls = {} # operation -> commands issued during the replay
+        self.unmatched = {} # command line -> times it was asked for without a recording
+        # No adb pool: traced adb commands are stored in the dnconsole "adb" form
+        super().__init__(console_path="replay", adb_path="replay", use_adb_pool=False, inventory_ttl=inventory_ttl)
+
+    def execute_command(self, cmd_args, timeout=None, cancel=None):
+        cmd_args = [str(a) for a in cmd_args]
+        key = tuple(cmd_args)
+        if cancel is None:
+            cancel = getattr(self._local, 'cancel', None)
+
+        with self.replay_lock:
+            op = cmd_args[0] if cmd_args else ""
+            self.calls[op] = self.calls.get(op, 0) + 1
+            recorded = self.responses.get(key)
+            if recorded:
+                entry = recorded.popleft() if len(recorded) > 1 else recorded[0]
+            else:
+                entry = None
+                self.unmatched[key] = self.unmatched.get(key, 0) + 1
+
+        if entry is None:
+            result = CommandResult(cmd_args, returncode=1, error="not in trace")
+        else:
+            duration = entry.get('d', 0) / 1000.0
+            cancelled = False
+            if self.speed:
+                wait = duration / self.speed
+                if cancel is not None:
+                    cancelled = cancel.wait(wait)
+                else:
+                    time.sleep(wait)
+            if cancelled:
+                result = CommandResult(cmd_args, duration=duration, cancelled=True)
+            else:
+                result = CommandResult(cmd_args, returncode=entry.get('rc', 0), stdout=entry.get('o', ""),
+                                       duration=duration, timed_out=bool(entry.get('to')),
+                                       cancelled=bool(entry.get('c')), error=entry.get('e'))
+
+        self._after_command(cmd_args, result)
+        return result
+
+    def compare(self):
+        # operation -> (recorded, replayed) for every operation that differs
+        recorded = trace_counts(self.entries)
+        with self.replay_lock:
+            calls = dict(self.calls)
+        return {op: (recorded.get(op, 0), calls.get(op, 0))
+                for op in sorted(set(recorded) | set(calls))
+                if recorded.get(op, 0) != calls.get(op, 0)}
+
+
+def summarize(entries):
+    # Per operation: count, rate, mean/max duration, failures
+    if not entries:
+        return "empty trace"
+    span = max(1, entries[-1]['t'] - entries[0]['t']) / 1000.0
+    lines = [f"{len(entries)} commands over {span:.1f}s", "",
+             f"{'operation':<12} {'count':>7} {'per min':>8} {'mean ms':>8} {'max ms':>8} {'failed':>7}"]
+    stats = {}
+    for entry in entries:
+        op = entry['a'][0] if entry['a'] else ""
+        s = stats.setdefault(op, [0, 0, 0, 0])
+        s[0] += 1
+        s[1] += entry.get('d', 0)
+        s[2] = max(s[2], entry.get('d', 0))
+        s[3] += 1 if entry.get('rc', 0) != 0 or entry.get('to') or entry.get('e') else 0
+    for op, (count, total, longest, failed) in sorted(stats.items(), key=lambda kv: -kv[1][0]):
+        lines.append(f"{op:<12} {count:>7} {count * 60 / span:>8.1f} {total / count:>8.1f} {longest:>8} {failed:>7}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("trace", help="trace file written by LDPlayerController.start_trace")
+    args = parser.parse_args()
+    print(summarize(list(read_trace(args.trace))))
+
+
+if __name__ == "__main__":
+    main()
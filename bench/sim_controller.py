@@ -0,0 +1,53 @@
+# LDPlayerController wired to an in-process FakeLDPlayer instead of
+# dnconsole.exe. Everything above execute_command (inventory cache, metrics,
+# timeouts, cancel tokens, AutomationManager) runs unchanged, without
+# spawning a process per command, so hundreds of instances can be simulated.
+#
+#   fleet = FakeLDPlayer(instances=100, boot_time="normal:30,5", latency=0.05)
+#   controller = SimulatedController(fleet)
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ld_controller import LDPlayerController
+from command_runner import CommandResult, command_timeout
+from fake_ldplayer import FakeLDPlayer, HANG
+
+
+class SimulatedController(LDPlayerController):
+    def __init__(self, fleet=None, inventory_ttl=1.5):
+        self.fleet = fleet or FakeLDPlayer()
+        self.fleet_lock = threading.Lock() # one dnconsole call at a time touches the fleet
+        # No adb pool: adb goes through execute_command(['adb', ...]) like the dnconsole fallback
+        super().__init__(console_path="simulated", adb_path="simulated", use_adb_pool=False, inventory_ttl=inventory_ttl)
+
+    def execute_command(self, cmd_args, timeout=None, cancel=None):
+        cmd_args = [str(a) for a in cmd_args]
+        if cancel is None:
+            cancel = getattr(self._local, 'cancel', None)
+        timeout = timeout or command_timeout(cmd_args)
+        start = time.time()
+
+        with self.fleet_lock:
+            delay = self.fleet.command_delay(cmd_args)
+        wait = min(delay, timeout)
+        if wait > 0:
+            if cancel is not None:
+                cancelled = cancel.wait(wait)
+            else:
+                time.sleep(wait)
+                cancelled = False
+            if cancelled or delay == HANG or delay > timeout:
+                result = CommandResult(cmd_args, duration=time.time() - start,
+                                       timed_out=not cancelled, cancelled=cancelled)
+                self._after_command(cmd_args, result)
+                return result
+
+        with self.fleet_lock:
+            code, out = self.fleet.handle(cmd_args)
+        result = CommandResult(cmd_args, returncode=code, stdout=out, duration=time.time() - start)
+        self._after_command(cmd_args, result)
+        return result
@@ -0,0 +1,49 @@
+import threading
+
+
+class CommandCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    # Shared "stop now" flag. Commands and waits started on behalf of an
+    # automation run check it, so Stop interrupts them instead of letting a
+    # sleep or a hung dnconsole call run to the end.
+    #
+    # child() gives a token that is cancelled together with this one but can
+    # also be cancelled on its own (one task runner out of many).
+    def __init__(self, parent=None):
+        self.event = threading.Event()
+        self.children = []
+        self.lock = threading.Lock()
+        if parent is not None:
+            parent._add_child(self)
+
+    def _add_child(self, child):
+        with self.lock:
+            self.children.append(child)
+            cancelled = self.event.is_set()
+        if cancelled:
+            child.cancel()
+
+    def child(self):
+        return CancelToken(parent=self)
+
+    def cancel(self):
+        with self.lock:
+            self.event.set()
+            children, self.children = self.children, []
+        for child in children:
+            child.cancel()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def wait(self, timeout=None):
+        # Sleeps up to timeout, returns True as soon as the token is cancelled
+        return self.event.wait(timeout)
+
+    def check(self):
+        if self.event.is_set():
+            raise CommandCancelled()
@@ -0,0 +1,206 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Upper bounds (seconds) of the latency buckets, the last bucket is +Inf
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Outcome of a command
+STATUS_OK = "ok"
+STATUS_ERROR = "error" # non-zero exit or could not be started
+STATUS_TIMEOUT = "timeout"
+STATUS_CANCELLED = "cancelled"
+
+
+def result_status(result):
+    # Status for a CommandResult
+    if result.timed_out:
+        return STATUS_TIMEOUT
+    if result.cancelled:
+        return STATUS_CANCELLED
+    return STATUS_OK if result.ok else STATUS_ERROR
+
+
+class LatencyHistogram:
+    # Fixed buckets like a Prometheus histogram: constant memory however many
+    # samples, percentiles are interpolated inside the bucket they fall in
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                # Nothing was observed outside [min, max]
+                lower = max(lower, self.min)
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+
+class CommandMetrics:
+    # Per-operation latency histograms and counters for controller commands.
+    # Operations are dnconsole sub-commands (list2, launch, ...) plus
+    # "adb_shell" for commands that went through the pooled adb session.
+    #
+    #   metrics.snapshot()         -> dict, see below
+    #   metrics.to_prometheus()    -> text exposition format
+    #   metrics.write(path)        -> .json or Prometheus text, by extension
+    def __init__(self, recent=200):
+        self.histograms = {} # operation -> LatencyHistogram
+        self.status_counts = {} # operation -> {status: count}
+        self.output_bytes = {} # operation -> total stdout bytes
+        self.per_instance = {} # index -> {'calls', 'seconds'}
+        self.recent = deque(maxlen=recent) # last calls, newest last
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+
+    def record(self, operation, index, duration, status, output_size=0):
+        with self.lock:
+            hist = self.histograms.get(operation)
+            if hist is None:
+                hist = self.histograms[operation] = LatencyHistogram()
+            hist.observe(duration)
+            counts = self.status_counts.setdefault(operation, {})
+            counts[status] = counts.get(status, 0) + 1
+            self.output_bytes[operation] = self.output_bytes.get(operation, 0) + output_size
+            if index is not None:
+                inst = self.per_instance.setdefault(str(index), {'calls': 0, 'seconds': 0.0})
+                inst['calls'] += 1
+                inst['seconds'] += duration
+            self.recent.append({
+                'time': time.time(),
+                'operation': operation,
+                'index': index,
+                'duration': duration,
+                'status': status,
+                'output_size': output_size
+            })
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.status_counts = {}
+            self.output_bytes = {}
+            self.per_instance = {}
+            self.recent.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        # {'uptime', 'operations': {op: {count, errors, ..., p50, p95, p99}},
+        #  'instances': {index: {calls, seconds}}, 'recent': [...]}
+        with self.lock:
+            operations = {}
+            for op, hist in self.histograms.items():
+                counts = self.status_counts.get(op, {})
+                operations[op] = {
+                    'count': hist.count,
+                    'ok': counts.get(STATUS_OK, 0),
+                    'errors': counts.get(STATUS_ERROR, 0),
+                    'timeouts': counts.get(STATUS_TIMEOUT, 0),
+                    'cancelled': counts.get(STATUS_CANCELLED, 0),
+                    'total_seconds': hist.sum,
+                    'mean': hist.mean(),
+                    'min': hist.min or 0.0,
+                    'max': hist.max or 0.0,
+                    'p50': hist.percentile(50),
+                    'p95': hist.percentile(95),
+                    'p99': hist.percentile(99),
+                    'output_bytes': self.output_bytes.get(op, 0),
+                }
+            return {
+                'uptime': time.time() - self.started_at,
+                'operations': operations,
+                'instances': {k: dict(v) for k, v in self.per_instance.items()},
+                'recent': list(self.recent),
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="ldplayer_command"):
+        with self.lock:
+            lines = [
+                f"# HELP {prefix}_duration_seconds dnconsole/adb command latency",
+                f"# TYPE {prefix}_duration_seconds histogram",
+            ]
+            for op, hist in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, n in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                    cumulative += n
+                    lines.append(f'{prefix}_duration_seconds_bucket{{operation="{op}",le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_duration_seconds_sum{{operation="{op}"}} {hist.sum:.6f}')
+                lines.append(f'{prefix}_duration_seconds_count{{operation="{op}"}} {hist.count}')
+
+            lines.append(f"# HELP {prefix}_total Commands by operation and outcome")
+            lines.append(f"# TYPE {prefix}_total counter")
+            for op, counts in sorted(self.status_counts.items()):
+                for status, n in sorted(counts.items()):
+                    lines.append(f'{prefix}_total{{operation="{op}",status="{status}"}} {n}')
+
+            lines.append(f"# HELP {prefix}_output_bytes_total Bytes of command output")
+            lines.append(f"# TYPE {prefix}_output_bytes_total counter")
+            for op, n in sorted(self.output_bytes.items()):
+                lines.append(f'{prefix}_output_bytes_total{{operation="{op}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        # Written to a temp file first so readers never see half a file
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+class MetricsExporter(threading.Thread):
+    # Writes metrics to path every interval seconds (and once more on stop)
+    def __init__(self, metrics, path, interval=30):
+        super().__init__(daemon=True)
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.export()
+        self.export()
+
+    def export(self):
+        try:
+            self.metrics.write(self.path)
+        except OSError as e:
+            print(f"[Metrics] Export to {self.path} failed: {e}")
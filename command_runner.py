@@ -0,0 +1,151 @@
+import os
+import signal
+import subprocess
+import time
+
+# Default timeout (seconds) per dnconsole sub-command. A dnconsole call that
+# hangs (stuck VM, locked config file) is killed after this instead of
+# blocking its caller forever.
+COMMAND_TIMEOUTS = {
+    'list2': 15,
+    'launch': 60,
+    'reboot': 60,
+    'quit': 30,
+    'quitall': 60,
+    'adb': 30,
+    'modify': 30,
+    'add': 60,
+    'copy': 300,
+    'remove': 60,
+    'rename': 15,
+    'sortWnd': 15,
+}
+DEFAULT_TIMEOUT = 30
+
+# How often a running command checks its cancel token
+CANCEL_POLL_INTERVAL = 0.1
+
+
+def command_timeout(cmd_args):
+    if not cmd_args:
+        return DEFAULT_TIMEOUT
+    return COMMAND_TIMEOUTS.get(cmd_args[0], DEFAULT_TIMEOUT)
+
+
+class CommandResult:
+    # Outcome of one dnconsole invocation. returncode is None when the
+    # process never started or had to be killed.
+    def __init__(self, args, returncode=None, stdout="", stderr="", duration=0.0, timed_out=False, cancelled=False, error=None):
+        self.args = args
+        self.returncode = returncode
+        self.stdout = stdout or ""
+        self.stderr = stderr or ""
+        self.duration = duration
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+        self.error = error # exception text if the process could not be run
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not self.timed_out and not self.cancelled and self.error is None
+
+    @property
+    def output(self):
+        # Stripped stdout, what execute_command used to return
+        return self.stdout.strip()
+
+    def describe(self):
+        # Short text for logs and the bulk status column
+        if self.timed_out:
+            return f"timed out after {self.duration:.1f}s"
+        if self.cancelled:
+            return "cancelled"
+        if self.error:
+            return self.error
+        if self.returncode:
+            return self.stderr.strip() or self.output or f"exit code {self.returncode}"
+        return self.output
+
+    def __repr__(self):
+        return (f"CommandResult({self.args!r}, returncode={self.returncode}, "
+                f"duration={self.duration:.2f}, timed_out={self.timed_out}, cancelled={self.cancelled})")
+
+
+def popen_kwargs():
+    # Hide the console window on Windows; on other systems put the child in
+    # its own process group so kill_process_tree can take its children too.
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        return {'startupinfo': startupinfo}
+    return {'start_new_session': True}
+
+
+def kill_process_tree(pid):
+    # dnconsole spawns helpers (adb, ldconsole) that keep the pipes open, so
+    # killing only the parent can leave communicate() waiting on them
+    try:
+        if os.name == 'nt':
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)],
+                           capture_output=True, startupinfo=startupinfo, timeout=10)
+        else:
+            os.killpg(pid, signal.SIGKILL)
+    except Exception as e:
+        print(f"Failed to kill process tree {pid}: {e}")
+
+
+def run_command(full_cmd, timeout=None, cancel=None, encoding='gbk'):
+    # Runs full_cmd and returns a CommandResult. The process tree is killed
+    # when timeout expires or the cancel token (see CancelToken) fires.
+    start = time.time()
+    try:
+        proc = subprocess.Popen(
+            full_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding=encoding,
+            errors='replace',
+            **popen_kwargs()
+        )
+    except Exception as e:
+        return CommandResult(full_cmd, duration=time.time() - start, error=str(e))
+
+    deadline = start + timeout if timeout else None
+    timed_out = cancelled = False
+    while True:
+        # Wake up regularly when there is a token to check
+        wait = None
+        if deadline is not None:
+            wait = max(0, deadline - time.time())
+        if cancel is not None:
+            wait = CANCEL_POLL_INTERVAL if wait is None else min(wait, CANCEL_POLL_INTERVAL)
+        try:
+            stdout, stderr = proc.communicate(timeout=wait)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel is not None and cancel.cancelled:
+                cancelled = True
+            elif deadline is not None and time.time() >= deadline:
+                timed_out = True
+            else:
+                continue
+        kill_process_tree(proc.pid)
+        try:
+            stdout, stderr = proc.communicate(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            stdout, stderr = "", ""
+        break
+
+    return CommandResult(
+        full_cmd,
+        returncode=None if (timed_out or cancelled) else proc.returncode,
+        stdout=stdout,
+        stderr=stderr,
+        duration=time.time() - start,
+        timed_out=timed_out,
+        cancelled=cancelled
+    )
@@ -0,0 +1,91 @@
+import gzip
+import json
+import threading
+import time
+
+# Trace files are JSON lines, one per command, appended as commands finish.
+# A session starts with a header line, then compact records where defaults
+# are left out:
+#   {"trace": 1, "start": 1700000000.0}
+#   {"t": 1234, "a": ["list2"], "o": "0,LDPlayer,...", "d": 41}
+#   {"t": 1300, "a": ["launch", "--index", "3"], "rc": 1, "d": 30000, "to": 1}
+# t = ms since the header, d = duration in ms, rc = exit code (default 0),
+# o = stdout (default ""), to/c = timed out/cancelled, e = error text.
+# A name ending in .gz is gzip compressed (appending adds a gzip member).
+TRACE_VERSION = 1
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class TraceRecorder:
+    # Appends every command the controller runs to path, see
+    # LDPlayerController.start_trace. Safe to call from any thread.
+    def __init__(self, path, flush_every=50):
+        self.path = path
+        self.flush_every = 1 if not path.endswith(".gz") else flush_every
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.count = 0
+        self.file = _open(path, "a")
+        self._write({'trace': TRACE_VERSION, 'start': self.started_at})
+        self.file.flush()
+
+    def _write(self, entry):
+        self.file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def record(self, args, result):
+        entry = {'t': int((time.time() - self.started_at) * 1000), 'a': [str(a) for a in args]}
+        if result.returncode != 0:
+            entry['rc'] = result.returncode
+        if result.stdout:
+            entry['o'] = result.stdout
+        entry['d'] = int(result.duration * 1000)
+        if result.timed_out:
+            entry['to'] = 1
+        if result.cancelled:
+            entry['c'] = 1
+        if result.error:
+            entry['e'] = result.error
+        with self.lock:
+            if self.file is None:
+                return
+            self._write(entry)
+            self.count += 1
+            if self.count % self.flush_every == 0:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def read_trace(path):
+    # Yields the command records of every session in path, in file order.
+    # A line cut off by a crash (or a truncated .gz) ends the trace.
+    try:
+        with _open(path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if 'trace' in entry:
+                    continue
+                yield entry
+    except EOFError:
+        return
+
+
+def trace_counts(entries):
+    # operation -> number of commands, e.g. {'list2': 120, 'adb': 530}
+    counts = {}
+    for entry in entries:
+        op = entry['a'][0] if entry['a'] else ""
+        counts[op] = counts.get(op, 0) + 1
+    return counts
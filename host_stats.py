@@ -0,0 +1,132 @@
+import ctypes
+import os
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class HostStatsProvider:
+    # Returns {'free_mem_mb': float, 'cpu_percent': float, 'cpu_count': int}
+    def get_stats(self):
+        raise NotImplementedError
+
+
+class SystemHostStats(HostStatsProvider):
+    # Real host numbers: psutil when installed, otherwise Win32 calls or /proc
+    def __init__(self):
+        self.cpu_count = os.cpu_count() or 1
+        self._last_cpu = None # (idle, total) from the previous sample
+        self.lock = threading.Lock()
+
+    def get_stats(self):
+        if psutil:
+            return {
+                'free_mem_mb': psutil.virtual_memory().available / (1024 * 1024),
+                'cpu_percent': psutil.cpu_percent(interval=None),
+                'cpu_count': self.cpu_count
+            }
+        return {
+            'free_mem_mb': self._free_mem_mb(),
+            'cpu_percent': self._cpu_percent(),
+            'cpu_count': self.cpu_count
+        }
+
+    def _free_mem_mb(self):
+        if os.name == 'nt':
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong),
+                    ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong),
+                    ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong),
+                    ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong),
+                    ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+            stat = MEMORYSTATUSEX()
+            stat.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(stat))
+            return stat.ullAvailPhys / (1024 * 1024)
+
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+        return 0
+
+    def _cpu_times(self):
+        # (idle, total) since boot
+        if os.name == 'nt':
+            idle, kernel, user = (ctypes.c_ulonglong(), ctypes.c_ulonglong(), ctypes.c_ulonglong())
+            ctypes.windll.kernel32.GetSystemTimes(ctypes.byref(idle), ctypes.byref(kernel), ctypes.byref(user))
+            # Kernel time includes idle time
+            return idle.value, kernel.value + user.value
+
+        with open("/proc/stat") as f:
+            values = [int(v) for v in f.readline().split()[1:]]
+        idle = values[3] + (values[4] if len(values) > 4 else 0)
+        return idle, sum(values)
+
+    def _cpu_percent(self):
+        # Usage since the previous call (0 on the first call)
+        with self.lock:
+            idle, total = self._cpu_times()
+            last, self._last_cpu = self._last_cpu, (idle, total)
+        if not last or total == last[1]:
+            return 0.0
+        return 100.0 * (1 - (idle - last[0]) / (total - last[1]))
+
+
+class FakeHostStats(HostStatsProvider):
+    # Fixed numbers for tests and the simulator; change the attributes to move them
+    def __init__(self, free_mem_mb=16384, cpu_percent=0.0, cpu_count=8):
+        self.free_mem_mb = free_mem_mb
+        self.cpu_percent = cpu_percent
+        self.cpu_count = cpu_count
+
+    def get_stats(self):
+        return {
+            'free_mem_mb': self.free_mem_mb,
+            'cpu_percent': self.cpu_percent,
+            'cpu_count': self.cpu_count
+        }
+
+
+class AdmissionControl:
+    # Decides whether the host can take one more instance with a given
+    # {'cpu': cores, 'memory': MB} budget. Instances still booting have not
+    # claimed their memory yet, so their budgets are passed in as 'committed'.
+    #   mem_reserve_mb - RAM always left for Windows and the manager itself
+    #   cpu_share      - fraction of a VM's cores it is expected to keep busy
+    #   max_cpu_percent- don't launch while the host is busier than this
+    def __init__(self, provider=None, mem_reserve_mb=2048, cpu_share=0.5, max_cpu_percent=85):
+        self.provider = provider or SystemHostStats()
+        self.mem_reserve_mb = mem_reserve_mb
+        self.cpu_share = cpu_share
+        self.max_cpu_percent = max_cpu_percent
+
+    def check(self, budget, committed=None):
+        # Returns (ok, reason); reason is a short text for the UI when not ok
+        committed = committed or []
+        stats = self.provider.get_stats()
+
+        pending_mem = sum(b['memory'] for b in committed)
+        free_mem = stats['free_mem_mb'] - self.mem_reserve_mb - pending_mem
+        if free_mem < budget['memory']:
+            return False, f"Waiting for RAM: {max(0, free_mem):.0f}MB free, instance needs {budget['memory']}MB"
+
+        if stats['cpu_percent'] >= self.max_cpu_percent:
+            return False, f"Waiting for CPU: host at {stats['cpu_percent']:.0f}%"
+
+        free_cores = stats['cpu_count'] * (1 - stats['cpu_percent'] / 100.0)
+        free_cores -= sum(b['cpu'] for b in committed) * self.cpu_share
+        need_cores = budget['cpu'] * self.cpu_share
+        if free_cores < need_cores:
+            return False, f"Waiting for CPU: {max(0, free_cores):.1f} cores free, instance needs {need_cores:.1f}"
+
+        return True, None
@@ -0,0 +1,124 @@
+import json
+import os
+import re
+import threading
+
+# LDPlayer keeps one JSON file per instance, <install>/vms/config/leidian{N}.config
+# (leidians.config next to them holds the global settings). Settings are
+# flat keys such as "advancedSettings.cpuCount"; the name is only stored once
+# the instance has been renamed.
+CONFIG_SUBDIR = os.path.join("vms", "config")
+CONFIG_FILE_RE = re.compile(r"^leidian(\d+)\.config$")
+
+
+def find_config_dir(console_path):
+    # Config directory of the install console_path (dnconsole.exe) belongs to, None if missing
+    if not console_path:
+        return None
+    directory = os.path.join(os.path.dirname(os.path.abspath(console_path)), CONFIG_SUBDIR)
+    return directory if os.path.isdir(directory) else None
+
+
+def _setting(data, key, default=None):
+    # "advancedSettings.cpuCount" as a flat key, or nested in older files
+    if key in data:
+        return data[key]
+    node = data
+    for part in key.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return default
+        node = node[part]
+    return node
+
+
+def _int(value):
+    # Settings are whatever the file holds, anything that isn't a number is unknown
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def default_name(index):
+    return "LDPlayer" if int(index) == 0 else f"LDPlayer-{index}"
+
+
+def parse_instance_config(index, data):
+    # {'index', 'name', 'cpu', 'memory', 'resolution'}; resolution is
+    # "width,height,dpi" like dnconsole modify --resolution, None if unknown.
+    # Malformed values become None instead of raising.
+    if not isinstance(data, dict):
+        data = {}
+    resolution = _setting(data, "advancedSettings.resolution")
+    if not isinstance(resolution, dict):
+        resolution = {}
+    width, height = _int(resolution.get("width")), _int(resolution.get("height"))
+    dpi = _int(_setting(data, "advancedSettings.resolutionDpi"))
+    name = _setting(data, "statusSettings.playerName")
+    return {
+        'index': str(index),
+        'name': name if isinstance(name, str) and name else default_name(index),
+        'cpu': _int(_setting(data, "advancedSettings.cpuCount")),
+        'memory': _int(_setting(data, "advancedSettings.memorySize")),
+        'resolution': f"{width},{height},{dpi}" if width and height and dpi else None
+    }
+
+
+class InstanceConfigReader:
+    # Reads every instance config in directory without starting a process.
+    # Files are only re-parsed when their mtime or size changes, so calling
+    # read_all() often costs a directory scan.
+    def __init__(self, directory):
+        self.directory = directory
+        self.cache = {} # index -> ((mtime_ns, size), parsed config)
+        self.lock = threading.Lock()
+
+    def read_all(self):
+        # {index: config dict}, see parse_instance_config
+        if not self.directory:
+            return {}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return {}
+        found = {}
+        with self.lock:
+            for name in names:
+                match = CONFIG_FILE_RE.match(name)
+                if match:
+                    config = self._load(match.group(1))
+                    if config is not None:
+                        found[match.group(1)] = config
+            # Removed instances
+            for index in [i for i in self.cache if i not in found]:
+                del self.cache[index]
+        return {i: dict(c) for i, c in found.items()}
+
+    def get(self, index):
+        # One instance's config (a single stat when unchanged), None if it has no file
+        if not self.directory:
+            return None
+        with self.lock:
+            config = self._load(str(index))
+        return dict(config) if config is not None else None
+
+    def _load(self, index):
+        path = os.path.join(self.directory, f"leidian{index}.config")
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.cache.pop(index, None)
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self.cache.get(index)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        try:
+            with open(path, encoding="utf-8-sig") as f:
+                config = parse_instance_config(index, json.load(f))
+        except (OSError, ValueError) as e:
+            # Probably mid-write by LDPlayer, keep what we had
+            print(f"[Config] Could not read {path}: {e}")
+            return cached[1] if cached is not None else None
+        self.cache[index] = (stamp, config)
+        return config
@@ -0,0 +1,107 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+
+class LogLine:
+    __slots__ = ('seq', 'time', 'index', 'message')
+
+    def __init__(self, seq, when, index, message):
+        self.seq = seq
+        self.time = when
+        self.index = index
+        self.message = message
+
+    def format(self):
+        stamp = time.strftime("%H:%M:%S", time.localtime(self.time))
+        return f"{stamp} [{self.index}] {self.message}"
+
+
+class InstanceLogStore:
+    # In-memory log of what each instance is doing. Every instance gets a
+    # ring buffer of max_lines, so memory stays flat over multi-day runs no
+    # matter how chatty a task is; a shared buffer of max_recent lines backs
+    # the unfiltered view. Lines carry a global sequence number so a viewer
+    # can ask for "everything after what I already have" (see lines_after).
+    #
+    # With log_dir set, lines are also written to log_dir/instances.log,
+    # rotated at max_bytes with backup_count old files kept.
+    def __init__(self, max_lines=500, max_recent=5000, log_dir=None, max_bytes=5 * 1024 * 1024, backup_count=3):
+        self.max_lines = max_lines
+        self.buffers = {} # index -> deque of LogLine
+        self.recent = deque(maxlen=max_recent) # all instances
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+
+        self.file_logger = None
+        if log_dir:
+            self.file_logger = self._open_file_logger(log_dir, max_bytes, backup_count)
+
+    def _open_file_logger(self, log_dir, max_bytes, backup_count):
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            handler = RotatingFileHandler(os.path.join(log_dir, "instances.log"), maxBytes=max_bytes,
+                                          backupCount=backup_count, encoding='utf-8')
+        except OSError as e:
+            print(f"[Logs] Can't write log files to {log_dir}: {e}")
+            return None
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger = logging.getLogger(f"ldmanager.instances.{id(self)}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        return logger
+
+    def append(self, index, message):
+        # Thread-safe, called from runner and scheduler threads
+        index = str(index)
+        with self.lock:
+            line = LogLine(next(self.counter), time.time(), index, message)
+            buf = self.buffers.get(index)
+            if buf is None:
+                buf = self.buffers[index] = deque(maxlen=self.max_lines)
+            buf.append(line)
+            self.recent.append(line)
+        if self.file_logger:
+            self.file_logger.info(f"[{index}] {message}")
+        return line.seq
+
+    def indices(self):
+        with self.lock:
+            keys = list(self.buffers)
+        return sorted(keys, key=lambda k: (0, int(k)) if k.isdigit() else (1, k))
+
+    def last_seq(self):
+        with self.lock:
+            return self.recent[-1].seq if self.recent else 0
+
+    def lines_after(self, seq=0, index=None, text=None, limit=1000):
+        # Lines newer than seq, oldest first, optionally for one instance
+        # and/or containing text (case-insensitive). At most the newest
+        # limit lines are returned. Walks back from the newest line, so the
+        # cost is proportional to what is new, not to the buffer size.
+        needle = text.lower() if text else None
+        with self.lock:
+            source = self.recent if index is None else self.buffers.get(str(index), ())
+            found = []
+            for line in reversed(source):
+                if line.seq <= seq or len(found) >= limit:
+                    break
+                if needle and needle not in line.message.lower():
+                    continue
+                found.append(line)
+        found.reverse()
+        return found
+
+    def clear(self, index=None):
+        with self.lock:
+            if index is None:
+                self.buffers = {}
+                self.recent.clear()
+            else:
+                self.buffers.pop(str(index), None)
+                self.recent = deque((l for l in self.recent if l.index != str(index)), maxlen=self.recent.maxlen)
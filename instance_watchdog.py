@@ -0,0 +1,74 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    # Counts failures of one instance inside a time window. Once max_failures
+    # is reached the breaker is open and the instance should be given up on
+    # instead of rebooted again.
+    def __init__(self, max_failures=3, window=1800):
+        self.max_failures = max_failures
+        self.window = window
+        self.failures = [] # timestamps
+
+    def record_failure(self, now=None):
+        now = now or time.time()
+        self.failures = [t for t in self.failures if now - t < self.window]
+        self.failures.append(now)
+
+    def is_open(self, now=None):
+        now = now or time.time()
+        return len([t for t in self.failures if now - t < self.window]) >= self.max_failures
+
+
+class InstanceWatchdog(threading.Thread):
+    # Heartbeats every active instance of an AutomationManager: a cheap
+    # "echo" over adb plus the EnterAndroid state from list2. After max_misses
+    # heartbeats in a row fail, it posts a "hung" event and the scheduler
+    # reboots or gives up on the instance (see AutomationManager._handle_hung).
+    def __init__(self, manager, interval=20, max_misses=3, adb_timeout=5):
+        super().__init__(daemon=True)
+        self.manager = manager
+        self.controller = manager.controller
+        self.interval = interval
+        self.max_misses = max_misses
+        self.adb_timeout = adb_timeout
+        self.misses = {} # index -> consecutive failed heartbeats
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        with self.controller.cancel_scope(self.manager.cancel_token):
+            self._loop()
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval) and self.manager.running:
+            for idx in self.manager.heartbeat_targets():
+                if self.stop_event.is_set():
+                    break
+                ok, reason = self.heartbeat(idx)
+                if ok:
+                    self.misses.pop(idx, None)
+                    continue
+                self.misses[idx] = self.misses.get(idx, 0) + 1
+                print(f"[Watchdog] Instance {idx} missed heartbeat {self.misses[idx]}/{self.max_misses}: {reason}")
+                if self.misses[idx] >= self.max_misses:
+                    self.misses.pop(idx, None)
+                    self.manager.events.put(("hung", idx, reason))
+
+    def heartbeat(self, idx):
+        # Returns (ok, reason)
+        try:
+            inst = next((i for i in self.controller.list_instances() if i['index'] == str(idx)), None)
+            if inst is None or not inst['running']:
+                return True, None # Gone entirely, that's the monitor's crash event, not a hang
+            if not inst.get('android'):
+                return False, "Android not up"
+            output = self.controller.run_adb_cmd(idx, "echo ok", timeout=self.adb_timeout)
+            if output.strip() != "ok":
+                return False, "no adb response"
+            return True, None
+        except Exception as e:
+            return False, str(e)
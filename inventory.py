@@ -0,0 +1,57 @@
+import threading
+import time
+
+# dnconsole sub-commands that change the instance list or run state
+MUTATING_COMMANDS = {'launch', 'quit', 'quitall', 'reboot', 'add', 'remove', 'modify', 'copy', 'rename'}
+
+
+def diff_snapshots(old, new):
+    # old/new: {key: item}, e.g. {index: instance dict}. 'added'/'removed'
+    # list items, 'changed' lists (old item, new item) pairs whose fields differ.
+    added = [new[i] for i in new if i not in old]
+    removed = [old[i] for i in old if i not in new]
+    changed = [(old[i], new[i]) for i in new if i in old and new[i] != old[i]]
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+class InstanceInventory:
+    # TTL cache in front of "dnconsole list2". Concurrent callers share one
+    # refresh, and the controller invalidates it after any mutating command.
+    def __init__(self, fetch, ttl=1.5):
+        self.fetch = fetch # callable returning a fresh list of instance dicts
+        self.ttl = ttl
+        self.instances = None
+        self.fetched_at = 0
+        self.snapshots = {} # consumer key -> {index: instance} seen at last poll
+        self.lock = threading.Lock()
+        # Set on every invalidate, so a poller can wake up right after a mutating command
+        self.invalidated = threading.Event()
+
+    def get(self, force=False):
+        with self.lock:
+            stale = self.instances is None or time.time() - self.fetched_at > self.ttl
+            if force or stale:
+                self.instances = self.fetch()
+                self.fetched_at = time.time()
+            # Copies, so callers can't modify the cache
+            return [dict(inst) for inst in self.instances]
+
+    def invalidate(self):
+        with self.lock:
+            self.instances = None
+        self.invalidated.set()
+
+    def snapshot(self, force=False):
+        return {inst['index']: inst for inst in self.get(force)}
+
+    def poll_changes(self, key="default", force=False):
+        # Diff against what this consumer saw last time, see diff_snapshots;
+        # 'current' is the new snapshot. The first poll reports every
+        # instance as added.
+        current = self.snapshot(force)
+        with self.lock:
+            previous = self.snapshots.get(key, {})
+            self.snapshots[key] = current
+        changes = diff_snapshots(previous, current)
+        changes['current'] = current
+        return changes
@@ -1,59 +1,280 @@
-import subprocess
 import os
+import shlex
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from adb_pool import AdbCommandLost, AdbConnectionPool
+from command_runner import CommandResult, command_timeout, run_command
+from command_metrics import CommandMetrics, STATUS_ERROR, STATUS_OK, STATUS_TIMEOUT, result_status
+from command_trace import TraceRecorder
+from instance_config import InstanceConfigReader, find_config_dir
+from inventory import InstanceInventory, MUTATING_COMMANDS
+
+def find_console_path():
+    # Common paths
+    potential_paths = [
+        r"C:\LDPlayer\LDPlayer9\dnconsole.exe",
+        r"D:\LDPlayer\LDPlayer9\dnconsole.exe",
+        r"C:\leidian\LDPlayer9\dnconsole.exe",
+        r"D:\leidian\LDPlayer9\dnconsole.exe",
+        r"C:\XuanZhi\LDPlayer9\dnconsole.exe",
+        r"E:\LDPlayer\LDPlayer9\dnconsole.exe" # Added based on screenshot hint if any, though not explicit
+    ]
+    
+    for path in potential_paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+# Shell command builders shared by the single-call adb_* methods and AdbBatch
+def tap_cmd(x, y):
+    return f"input tap {x} {y}"
+
+def swipe_cmd(x1, y1, x2, y2, duration=300):
+    return f"input swipe {x1} {y1} {x2} {y2} {duration}"
+
+def input_text_cmd(text):
+    # input text types %s as a space; newlines can't be typed. The rest is
+    # shell-quoted: the command runs in a shared shell followed by our echo
+    # marker, so quotes, ; or & in user text must stay part of the text
+    safe_text = text.replace("\r", " ").replace("\n", " ").replace(" ", "%s")
+    return f"input text {shlex.quote(safe_text)}"
+
+def start_app_cmd(package_name):
+    return f"monkey -p {package_name} -c android.intent.category.LAUNCHER 1"
+
+def stop_app_cmd(package_name):
+    return f"am force-stop {package_name}"
+
+
+def adb_args(index, cmd):
+    # dnconsole arguments running cmd in the instance's shell
+    return ['adb', '--index', str(index), '--command', f'"{cmd}"']
+
+def command_index(cmd_args):
+    # Value of --index in a dnconsole argument list, None if there is none
+    try:
+        return str(cmd_args[cmd_args.index('--index') + 1])
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_list2(output):
+    instances = []
+    if output:
+        lines = output.split('\n')
+        for line in lines:
+            parts = line.split(',')
+            # list2 format: Index,Title,TopWindowHandle,DedicatedTerminalHandle,EnterAndroid,ProcessID,VBoxProcessID,Status
+            if len(parts) >= 8:
+                index = parts[0]
+                name = parts[1]
+                android = parts[4] == '1'
+                pid = parts[5]
+                vbox_pid = parts[6]
+                
+                is_running = (pid != '0' and pid != '-1') or (vbox_pid != '0' and vbox_pid != '-1')
+                
+                instances.append({
+                    'index': index,
+                    'name': name,
+                    'running': is_running,
+                    'android': is_running and android, # Android has finished booting
+                    'pid': pid
+                })
+    
+    # Sort by index (int)
+    instances.sort(key=lambda x: int(x['index']))
+    return instances
+
+
+class AdbBatch:
+    # Buffers input commands for one index and sends them as a single
+    # "cmd1; cmd2; ..." shell invocation when flushed or when the with-block exits.
+    #
+    #   with controller.batch(index) as b:
+    #       b.tap(300, 1100).sleep(1).input_text("hello").sleep(1).tap(650, 1150)
+    def __init__(self, controller, index):
+        self.controller = controller
+        self.index = index
+        self.commands = []
+        self.sleep_total = 0
+
+    def add(self, cmd):
+        self.commands.append(cmd)
+        return self
+
+    def tap(self, x, y):
+        return self.add(tap_cmd(x, y))
+
+    def swipe(self, x1, y1, x2, y2, duration=300):
+        self.sleep_total += duration / 1000.0
+        return self.add(swipe_cmd(x1, y1, x2, y2, duration))
+
+    def input_text(self, text):
+        return self.add(input_text_cmd(text))
+
+    def start_app(self, package_name):
+        return self.add(start_app_cmd(package_name))
+
+    def stop_app(self, package_name):
+        return self.add(stop_app_cmd(package_name))
+
+    def sleep(self, seconds):
+        self.sleep_total += seconds
+        return self.add(f"sleep {seconds}")
+
+    def flush(self):
+        if not self.commands:
+            return ""
+        cmd = "; ".join(self.commands)
+        # Give the pooled session enough time for the sleeps inside the batch
+        timeout = None
+        if self.sleep_total:
+            timeout = 10 + self.sleep_total
+        self.commands = []
+        self.sleep_total = 0
+        return self.controller.run_adb_cmd(self.index, cmd, timeout=timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Drop the buffer if the block failed half-way
+        if exc_type is None:
+            self.flush()
+        else:
+            self.commands = []
+        return False
+
+
+class RateLimiter:
+    # Spaces calls at least 1/rate seconds apart across all threads
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_time = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.time()
+            wait = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
 
 class LDPlayerController:
-    def __init__(self, console_path=None):
+    def __init__(self, console_path=None, adb_path=None, use_adb_pool=True, inventory_ttl=1.5):
         self.console_path = console_path
         if not self.console_path:
             self.console_path = self.find_console_path()
+        self.adb_path = adb_path
+
+        # Persistent "adb shell" sessions per running index (falls back to dnconsole adb)
+        self.adb_pool = AdbConnectionPool(self) if use_adb_pool else None
+
+        # Cached list2 results, see list_instances
+        self.inventory = InstanceInventory(self.fetch_instances, ttl=inventory_ttl)
+
+        # index -> time we asked it to stop, lets the monitor tell a stop from a crash
+        self.stop_requests = {}
+
+        # Names and hardware settings from LDPlayer's own config files, see config_reader
+        self.configs = None
+
+        # CPU/memory each instance was given through modify_instance, index -> {'cpu', 'memory'}
+        self.instance_budgets = {}
+        self.default_budget = {'cpu': 2, 'memory': 2048}
+
+        # Default worker count for run_bulk
+        self.bulk_workers = 4
+
+        # Per-thread CancelToken for dnconsole calls, see cancel_scope
+        self._local = threading.local()
+
+        # Latency histograms and counters of every command, see CommandMetrics
+        self.metrics = CommandMetrics()
+
+        # Every command and its output, appended to a file while set, see start_trace
+        self.trace = None
 
     def find_console_path(self):
-        # Common paths
-        potential_paths = [
-            r"C:\LDPlayer\LDPlayer9\dnconsole.exe",
-            r"D:\LDPlayer\LDPlayer9\dnconsole.exe",
-            r"C:\leidian\LDPlayer9\dnconsole.exe",
-            r"D:\leidian\LDPlayer9\dnconsole.exe",
-            r"C:\XuanZhi\LDPlayer9\dnconsole.exe",
-            r"E:\LDPlayer\LDPlayer9\dnconsole.exe" # Added based on screenshot hint if any, though not explicit
-        ]
-        
-        for path in potential_paths:
-            if os.path.exists(path):
-                return path
-        return None
+        return find_console_path()
+
+    @contextmanager
+    def cancel_scope(self, token):
+        # dnconsole calls made by this thread inside the block are killed
+        # as soon as token is cancelled (AutomationManager.stop_automation)
+        previous = getattr(self._local, 'cancel', None)
+        self._local.cancel = token
+        try:
+            yield token
+        finally:
+            self._local.cancel = previous
+
+    def start_trace(self, path):
+        # Records every command from now on to path (see command_trace),
+        # replayable with bench/replay_controller.py
+        self.stop_trace()
+        self.trace = TraceRecorder(path)
+        return self.trace
 
-    def execute_command(self, cmd_args):
+    def stop_trace(self):
+        trace, self.trace = self.trace, None
+        if trace is not None:
+            trace.close()
+
+    def execute_command(self, cmd_args, timeout=None, cancel=None):
+        # Runs dnconsole and returns a CommandResult. timeout defaults to the
+        # per-command value in COMMAND_TIMEOUTS; the process tree is killed
+        # when it expires or when the cancel token fires.
         if not self.console_path:
             raise FileNotFoundError("LDPlayer console (dnconsole.exe) not found.")
         
         full_cmd = [self.console_path] + cmd_args
+        if cancel is None:
+            cancel = getattr(self._local, 'cancel', None)
         
-        # Determine startup flags to hide window
-        startupinfo = None
-        if os.name == 'nt':
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        
+        result = None
         try:
-            # shell=True sometimes helps with elevation context or path resolution on Windows,
-            # but usually for dnconsole, direct execution is better.
-            # However, if Admin is needed, the main app should be Admin.
-            result = subprocess.run(
-                full_cmd, 
-                capture_output=True, 
-                text=True, 
-                startupinfo=startupinfo,
-                encoding='gbk', # LDPlayer outputs GBK
-                errors='replace'
+            result = run_command(
+                full_cmd,
+                timeout=timeout or command_timeout(cmd_args),
+                cancel=cancel,
+                encoding='gbk' # LDPlayer outputs GBK
             )
-            return result.stdout.strip()
+            if result.error:
+                print(f"Error executing command {' '.join(full_cmd)}: {result.error}")
+            elif result.timed_out:
+                print(f"Command timed out after {result.duration:.1f}s, killed: {' '.join(full_cmd)}")
+            return result
         except Exception as e:
             print(f"Error executing command {' '.join(full_cmd)}: {e}")
-            return ""
+            result = CommandResult(full_cmd, error=str(e))
+            return result
+        finally:
+            self._after_command(cmd_args, result)
+
+    def _after_command(self, cmd_args, result):
+        # Bookkeeping after every dnconsole call, also called by backends that
+        # replace execute_command (bench/sim_controller.py, bench/replay_controller.py).
+        # result is None if the command raised before producing one.
+        # Instance list/state may have changed, next list_instances must re-read it
+        if cmd_args and cmd_args[0] in MUTATING_COMMANDS:
+            self.inventory.invalidate()
+        if result is not None:
+            self.metrics.record(cmd_args[0] if cmd_args else "", command_index(cmd_args),
+                                result.duration, result_status(result), len(result.stdout))
+            if self.trace is not None:
+                self.trace.record(cmd_args, result)
 
     def get_adb_path(self):
+        if self.adb_path:
+            return self.adb_path
         if not self.console_path:
             return None
         # ADB is usually in the same directory as dnconsole.exe, named adb.exe or inside a bin folder
@@ -63,83 +284,249 @@ class LDPlayerController:
             return adb_path
         return "adb" # Fallback to system path
 
-    def run_adb_cmd(self, index, cmd_args):
+    def get_adb_serial(self, index):
+        # LDPlayer instance N listens on console port 5554 + 2N
+        return f"emulator-{5554 + int(index) * 2}"
+
+    def run_adb_cmd(self, index, cmd_args, timeout=None):
+        # Fast path: reuse the pooled adb shell session for this index
+        cancel = getattr(self._local, 'cancel', None)
+        if self.adb_pool:
+            start = time.time()
+            try:
+                output = self.adb_pool.run(index, cmd_args, timeout, cancel)
+            except AdbCommandLost as e:
+                # Sent but no answer: it may have run, so no dnconsole fallback
+                duration = time.time() - start
+                self.metrics.record('adb_shell', str(index), duration,
+                                    STATUS_TIMEOUT if e.timed_out else STATUS_ERROR, 0)
+                if self.trace is not None:
+                    args = adb_args(index, cmd_args)
+                    self.trace.record(args, CommandResult(args, duration=duration, timed_out=e.timed_out,
+                                                          error=None if e.timed_out else str(e)))
+                return ""
+            duration = time.time() - start
+            self.metrics.record('adb_shell', str(index), duration,
+                                STATUS_ERROR if output is None else STATUS_OK, len(output or ""))
+            if self.trace is not None and output is not None:
+                # Traced like the dnconsole form so replays don't need a pool
+                args = adb_args(index, cmd_args)
+                self.trace.record(args, CommandResult(args, returncode=0, stdout=output, duration=duration))
+            if output is not None:
+                return output
+        if cancel is not None and cancel.cancelled:
+            return ""
+
         # adb -s 127.0.0.1:5555 shell ... (simulated via dnconsole adb)
-        full_cmd = ['adb', '--index', str(index), '--command', f'"{cmd_args}"']
-        return self.execute_command(full_cmd)
+        full_cmd = adb_args(index, cmd_args)
+        return self.execute_command(full_cmd, timeout=timeout).output
+
+    def is_ready(self, index):
+        # Ready = list2 says Android is up (EnterAndroid) and the boot has completed
+        try:
+            instances = self.list_instances()
+        except RuntimeError as e:
+            # list2 failed or timed out: not ready yet, the next probe tries again
+            print(f"Readiness probe for {index} failed: {e}")
+            return False
+        inst = next((i for i in instances if i['index'] == str(index)), None)
+        if not inst or not inst.get('android'):
+            return False
+        return self.run_adb_cmd(index, "getprop sys.boot_completed").strip() == "1"
+
+    def _sleep(self, seconds, cancel=None):
+        # time.sleep that a CancelToken can cut short, True if it was cancelled
+        if cancel is None:
+            time.sleep(seconds)
+            return False
+        return cancel.wait(seconds)
+
+    def wait_until_ready(self, index, timeout=180, initial_delay=1.0, max_delay=5.0, cancel=None):
+        # Polls is_ready with backoff. Returns True when ready, False on timeout
+        # or as soon as the cancel token (CancelToken) is cancelled. A probe
+        # that fails (list2 error/timeout) counts as not ready yet.
+        deadline = time.time() + timeout
+        delay = initial_delay
+        while time.time() < deadline:
+            if cancel and cancel.cancelled:
+                return False
+            if self.is_ready(index):
+                return True
+            if self._sleep(min(delay, max(0, deadline - time.time())), cancel):
+                return False
+            delay = min(delay * 1.5, max_delay)
+        return False
+
+    def is_app_foreground(self, index, package_name):
+        output = self.run_adb_cmd(index, "dumpsys window | grep mCurrentFocus")
+        return package_name in output
+
+    def wait_for_app(self, index, package_name, timeout=10, interval=0.5, cancel=None):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if cancel and cancel.cancelled:
+                return False
+            if self.is_app_foreground(index, package_name):
+                return True
+            if self._sleep(interval, cancel):
+                return False
+        return False
+
+    def batch(self, index):
+        return AdbBatch(self, index)
 
     def adb_swipe(self, index, x1, y1, x2, y2, duration=300):
-        self.run_adb_cmd(index, f"input swipe {x1} {y1} {x2} {y2} {duration}")
+        self.run_adb_cmd(index, swipe_cmd(x1, y1, x2, y2, duration))
 
     def adb_tap(self, index, x, y):
-        self.run_adb_cmd(index, f"input tap {x} {y}")
+        self.run_adb_cmd(index, tap_cmd(x, y))
 
     def adb_input_text(self, index, text):
-        # Escape spaces
-        safe_text = text.replace(" ", "%s")
-        self.run_adb_cmd(index, f"input text {safe_text}")
+        self.run_adb_cmd(index, input_text_cmd(text))
         
     def adb_start_app(self, index, package_name):
-        self.run_adb_cmd(index, f"monkey -p {package_name} -c android.intent.category.LAUNCHER 1")
+        self.run_adb_cmd(index, start_app_cmd(package_name))
     
     def adb_stop_app(self, index, package_name):
-        self.run_adb_cmd(index, f"am force-stop {package_name}")
-
-    def list_instances(self):
-        output = self.execute_command(['list2'])
-        instances = []
-        if output:
-            lines = output.split('\n')
-            for line in lines:
-                parts = line.split(',')
-                # list2 format: Index,Title,TopWindowHandle,DedicatedTerminalHandle,EnterAndroid,ProcessID,VBoxProcessID,Status
-                if len(parts) >= 8:
-                    index = parts[0]
-                    name = parts[1]
-                    pid = parts[5]
-                    vbox_pid = parts[6]
-                    
-                    is_running = (pid != '0' and pid != '-1') or (vbox_pid != '0' and vbox_pid != '-1')
-                    
-                    instances.append({
-                        'index': index,
-                        'name': name,
-                        'running': is_running,
-                        'pid': pid
-                    })
-        
-        # Sort by index (int)
-        instances.sort(key=lambda x: int(x['index']))
-        return instances
+        self.run_adb_cmd(index, stop_app_cmd(package_name))
+
+    def stop_was_requested(self, index, within=120):
+        requested = max(self.stop_requests.get(str(index), 0), self.stop_requests.get('*', 0))
+        return time.time() - requested < within
+
+    def list_instances(self, force=False):
+        # Served from the TTL cache; force=True always re-runs list2
+        return self.inventory.get(force)
+
+    def config_reader(self):
+        # Follows console_path, which the Settings tab can change
+        directory = find_config_dir(self.console_path)
+        if self.configs is None or self.configs.directory != directory:
+            self.configs = InstanceConfigReader(directory)
+        return self.configs
+
+    def get_instance_config(self, index):
+        # {'index', 'name', 'cpu', 'memory', 'resolution'} from the config file, None if unknown
+        return self.config_reader().get(index)
+
+    def list_configured(self):
+        # Every instance's name and hardware settings without starting a
+        # process; falls back to list2 (names only) when there are no config files
+        configs = self.config_reader().read_all()
+        if configs:
+            return [configs[i] for i in sorted(configs, key=int)]
+        return [{'index': inst['index'], 'name': inst['name'], 'cpu': None, 'memory': None, 'resolution': None}
+                for inst in self.list_instances()]
+
+    def fetch_instances(self):
+        result = self.execute_command(['list2'])
+        if not result.ok and not result.stdout:
+            # Don't report every instance as gone because dnconsole hung
+            raise RuntimeError(f"list2 failed: {result.describe()}")
+        return parse_list2(result.output)
 
     def start_instance(self, index):
-        self.execute_command(['launch', '--index', str(index)])
+        return self.execute_command(['launch', '--index', str(index)])
 
     def stop_instance(self, index):
-        self.execute_command(['quit', '--index', str(index)])
+        self.stop_requests[str(index)] = time.time()
+        if self.adb_pool:
+            self.adb_pool.close(index)
+        return self.execute_command(['quit', '--index', str(index)])
         
     def quit_all(self):
-        self.execute_command(['quitall'])
+        self.stop_requests['*'] = time.time()
+        if self.adb_pool:
+            self.adb_pool.close_all()
+        return self.execute_command(['quitall'])
 
     def reboot_instance(self, index):
-        self.execute_command(['reboot', '--index', str(index)])
+        self.stop_requests[str(index)] = time.time()
+        if self.adb_pool:
+            self.adb_pool.close(index)
+        return self.execute_command(['reboot', '--index', str(index)])
 
     def create_instance(self, name):
-        self.execute_command(['add', '--name', name])
+        return self.execute_command(['add', '--name', name])
         
     def remove_instance(self, index):
-        self.execute_command(['remove', '--index', str(index)])
+        self.stop_requests[str(index)] = time.time()
+        if self.adb_pool:
+            self.adb_pool.close(index)
+        return self.execute_command(['remove', '--index', str(index)])
 
     def modify_instance(self, index, cpu, memory, resolution=None):
         # dnconsole modify --index 0 --cpu 2 --memory 2048 --resolution 720,1280,320
         cmd = ['modify', '--index', str(index), '--cpu', str(cpu), '--memory', str(memory)]
         if resolution:
              cmd.extend(['--resolution', resolution])
-        self.execute_command(cmd)
+        self.instance_budgets[str(index)] = {'cpu': int(cpu), 'memory': int(memory)}
+        return self.execute_command(cmd)
+
+    def plan_modify(self, indices, cpu, memory, resolution=None):
+        # Splits indices into (to_modify, unchanged) by comparing with the
+        # config files; instances whose settings can't be read are modified
+        to_modify, unchanged = [], []
+        for index in indices:
+            config = self.get_instance_config(index)
+            same = (config is not None and config['cpu'] == int(cpu) and config['memory'] == int(memory)
+                    and (not resolution or config['resolution'] == resolution))
+            (unchanged if same else to_modify).append(str(index))
+        return to_modify, unchanged
+
+    def get_instance_budget(self, index):
+        # What the instance is configured with, else what we last set, else the default
+        config = self.get_instance_config(index)
+        if config and config['cpu'] and config['memory']:
+            return {'cpu': config['cpu'], 'memory': config['memory']}
+        return self.instance_budgets.get(str(index), self.default_budget)
 
     def sort_windows(self):
-        self.execute_command(['sortWnd'])
+        return self.execute_command(['sortWnd'])
         
+    def run_bulk(self, action, indices, max_workers=None, rate_limit=None, on_result=None, **kwargs):
+        # Runs start/stop/reboot/remove/modify for many indices on a worker pool.
+        # rate_limit caps operations started per second (e.g. to avoid booting
+        # 50 VMs onto the disk at once). on_result is called from the worker
+        # thread as each index finishes. Returns one result dict per index, in
+        # the order of indices: {'index', 'success', 'output', 'elapsed', 'returncode'}
+        actions = {
+            'start': self.start_instance,
+            'stop': self.stop_instance,
+            'reboot': self.reboot_instance,
+            'remove': self.remove_instance,
+            'modify': self.modify_instance,
+        }
+        func = actions[action]
+        limiter = RateLimiter(rate_limit)
+
+        def run_one(index):
+            limiter.wait()
+            start = time.time()
+            returncode = None
+            try:
+                command = func(index, **kwargs)
+                success = command.ok
+                output = command.describe()
+                returncode = command.returncode
+            except Exception as e:
+                output = str(e)
+                success = False
+            result = {
+                'index': str(index),
+                'success': success,
+                'output': output or "",
+                'elapsed': time.time() - start,
+                'returncode': returncode
+            }
+            if on_result:
+                on_result(result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.bulk_workers) as pool:
+            futures = [pool.submit(run_one, index) for index in indices]
+            return [future.result() for future in futures]
+
     def global_config(self, fps=60, audio=0, fast_play=1):
         # example global setting
         pass
@@ -0,0 +1,111 @@
+import customtkinter as ctk
+
+ALL_INSTANCES = "All"
+
+
+class LogPanel(ctk.CTkToplevel):
+    # Live view of an InstanceLogStore. Every refresh_ms it asks the store for
+    # the lines after the last one shown and inserts them into a single
+    # textbox in one go; old lines are trimmed from the top so the widget
+    # never holds more than max_lines. Changing the instance or text filter
+    # reloads the view from the store.
+    def __init__(self, master, store, refresh_ms=250, max_lines=2000, batch_size=500, **kwargs):
+        super().__init__(master, **kwargs)
+        self.store = store
+        self.refresh_ms = refresh_ms
+        self.max_lines = max_lines
+        self.batch_size = batch_size # lines fetched per refresh, the rest next time
+        self.last_seq = 0
+        self.shown = 0 # lines currently in the textbox
+        self.paused = False
+
+        self.title("Instance Logs")
+        self.geometry("800x450")
+
+        bar = ctk.CTkFrame(self, fg_color="transparent")
+        bar.pack(fill="x", padx=10, pady=(10, 5))
+
+        ctk.CTkLabel(bar, text="Instance:").pack(side="left")
+        self.combo_index = ctk.CTkComboBox(bar, width=90, values=[ALL_INSTANCES], command=lambda _: self.reload())
+        self.combo_index.set(ALL_INSTANCES)
+        self.combo_index.pack(side="left", padx=5)
+
+        ctk.CTkLabel(bar, text="Filter:").pack(side="left", padx=(10, 0))
+        self.entry_filter = ctk.CTkEntry(bar, width=200, placeholder_text="text")
+        self.entry_filter.pack(side="left", padx=5)
+        self.entry_filter.bind("<KeyRelease>", lambda e: self.reload())
+
+        self.chk_pause = ctk.CTkCheckBox(bar, text="Pause", command=self.toggle_pause)
+        self.chk_pause.pack(side="left", padx=10)
+        ctk.CTkButton(bar, text="Clear", width=60, command=self.clear).pack(side="right")
+
+        self.textbox = ctk.CTkTextbox(self, font=("Consolas", 11), wrap="none")
+        self.textbox.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.textbox.configure(state="disabled")
+
+        self.after_id = None
+        self.reload()
+
+    def selected_index(self):
+        value = self.combo_index.get()
+        return None if value == ALL_INSTANCES else value
+
+    def reload(self):
+        # Filter changed, start over from what the store still holds
+        self.last_seq = 0
+        self.shown = 0
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.configure(state="disabled")
+        self.refresh(reschedule=False)
+
+    def toggle_pause(self):
+        self.paused = self.chk_pause.get() == 1
+
+    def clear(self):
+        self.store.clear(self.selected_index())
+        self.reload()
+
+    def refresh(self, reschedule=True):
+        if not self.paused:
+            # Pick up instances that logged for the first time
+            values = [ALL_INSTANCES] + self.store.indices()
+            if values != self.combo_index.cget("values"):
+                self.combo_index.configure(values=values)
+
+            newest = self.store.last_seq()
+            lines = self.store.lines_after(self.last_seq, index=self.selected_index(),
+                                           text=self.entry_filter.get().strip() or None,
+                                           limit=self.max_lines)
+            if self.last_seq and len(lines) > self.batch_size:
+                # Big backlog, show it over the next few refreshes
+                lines = lines[:self.batch_size]
+                self.last_seq = lines[-1].seq
+            else:
+                # Also skips lines the filter rejected, so they aren't scanned again
+                self.last_seq = max(newest, lines[-1].seq if lines else 0)
+            if lines:
+                self._append(lines)
+
+        if reschedule or self.after_id is None:
+            self.after_id = self.after(self.refresh_ms, self.refresh)
+
+    def _append(self, lines):
+        # One insert per batch instead of one widget/insert per line
+        at_bottom = self.textbox.yview()[1] >= 0.999
+        self.textbox.configure(state="normal")
+        self.textbox.insert("end", "\n".join(line.format() for line in lines) + "\n")
+        self.shown += len(lines)
+        if self.shown > self.max_lines:
+            extra = self.shown - self.max_lines
+            self.textbox.delete("1.0", f"{extra + 1}.0")
+            self.shown = self.max_lines
+        self.textbox.configure(state="disabled")
+        if at_bottom:
+            self.textbox.see("end")
+
+    def destroy(self):
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+        super().destroy()
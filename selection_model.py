@@ -0,0 +1,53 @@
+class SelectionModel:
+    # Set of selected instance indices with change observers. Handlers ask the
+    # model instead of walking widgets; observers get (added, removed) sets so
+    # they can update incrementally.
+    def __init__(self):
+        self.selected = set()
+        self.observers = []
+
+    def subscribe(self, callback):
+        self.observers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.observers:
+            self.observers.remove(callback)
+
+    def _notify(self, added, removed):
+        if not added and not removed:
+            return
+        for callback in list(self.observers):
+            callback(added, removed)
+
+    def __contains__(self, key):
+        return key in self.selected
+
+    def __len__(self):
+        return len(self.selected)
+
+    def set(self, key, selected=True):
+        if selected and key not in self.selected:
+            self.selected.add(key)
+            self._notify({key}, set())
+        elif not selected and key in self.selected:
+            self.selected.discard(key)
+            self._notify(set(), {key})
+
+    def update(self, keys):
+        added = set(keys) - self.selected
+        self.selected |= added
+        self._notify(added, set())
+
+    def discard_all(self, keys):
+        removed = self.selected & set(keys)
+        self.selected -= removed
+        self._notify(set(), removed)
+
+    def clear(self):
+        removed = self.selected
+        self.selected = set()
+        self._notify(set(), removed)
+
+    def get(self):
+        # Selected indices in numeric order
+        return sorted(self.selected, key=lambda k: (0, int(k)) if str(k).isdigit() else (1, str(k)))
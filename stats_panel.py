@@ -0,0 +1,67 @@
+import customtkinter as ctk
+
+
+class StatsPanel(ctk.CTkToplevel):
+    # Per-operation command latency table from CommandMetrics, refreshed
+    # every refresh_ms. Rendered as fixed-width text in one textbox.
+    def __init__(self, master, metrics, refresh_ms=1000, export_path=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.metrics = metrics
+        self.refresh_ms = refresh_ms
+        self.export_path = export_path
+
+        self.title("Command Stats")
+        self.geometry("760x360")
+
+        bar = ctk.CTkFrame(self, fg_color="transparent")
+        bar.pack(fill="x", padx=10, pady=(10, 5))
+        self.lbl_summary = ctk.CTkLabel(bar, text="", anchor="w")
+        self.lbl_summary.pack(side="left")
+        ctk.CTkButton(bar, text="Reset", width=60, command=self.reset).pack(side="right")
+        if self.export_path:
+            ctk.CTkButton(bar, text="Export", width=60, command=self.export).pack(side="right", padx=5)
+
+        self.textbox = ctk.CTkTextbox(self, font=("Consolas", 11), wrap="none")
+        self.textbox.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        self.after_id = None
+        self.refresh()
+
+    def reset(self):
+        self.metrics.reset()
+        self.render()
+
+    def export(self):
+        try:
+            self.metrics.write(self.export_path)
+            self.lbl_summary.configure(text=f"Exported to {self.export_path}")
+        except OSError as e:
+            self.lbl_summary.configure(text=f"Export failed: {e}")
+
+    def render(self):
+        snap = self.metrics.snapshot()
+        ops = sorted(snap['operations'].items(), key=lambda kv: -kv[1]['total_seconds'])
+        lines = [f"{'operation':<12}{'calls':>7}{'fail':>6}{'t/o':>5}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'total':>10}"]
+        for op, m in ops:
+            failed = m['errors'] + m['timeouts']
+            lines.append(f"{op:<12}{m['count']:>7}{failed:>6}{m['timeouts']:>5}"
+                         f"{m['mean'] * 1000:>7.0f}ms{m['p50'] * 1000:>7.0f}ms{m['p95'] * 1000:>7.0f}ms"
+                         f"{m['p99'] * 1000:>7.0f}ms{m['max'] * 1000:>7.0f}ms{m['total_seconds']:>9.1f}s")
+
+        calls = sum(m['count'] for m in snap['operations'].values())
+        self.lbl_summary.configure(text=f"{calls} commands in {snap['uptime'] / 60:.1f} min")
+
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("end", "\n".join(lines))
+        self.textbox.configure(state="disabled")
+
+    def refresh(self):
+        self.render()
+        self.after_id = self.after(self.refresh_ms, self.refresh)
+
+    def destroy(self):
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+        super().destroy()
@@ -0,0 +1,119 @@
+import threading
+import time
+
+# Events published by StatusMonitor, callbacks get (event, instance dict)
+EVENT_ADDED = "added"
+EVENT_REMOVED = "removed"
+EVENT_STARTED = "started"
+EVENT_STOPPED = "stopped" # we asked for it (quit/reboot/remove)
+EVENT_CRASHED = "crashed" # went away on its own
+EVENT_ANDROID_READY = "android_ready"
+EVENT_RENAMED = "renamed"
+
+
+class StatusMonitor(threading.Thread):
+    # Polls list2 in the background and publishes state-change events.
+    # Polls every fast_interval while something is booting or just changed,
+    # then backs off towards slow_interval while nothing moves. A mutating
+    # controller command (launch, quit, ...) wakes it up immediately.
+    def __init__(self, controller, fast_interval=1.0, slow_interval=10.0, backoff=1.5):
+        super().__init__(daemon=True)
+        self.controller = controller
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.backoff = backoff
+        self.interval = fast_interval
+        self.subscribers = []
+        self.running = False
+        self.stop_event = threading.Event()
+        self.last = None # {index: instance} from the previous poll
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback):
+        with self.lock:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+    def publish(self, event, inst):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            try:
+                callback(event, inst)
+            except Exception as e:
+                print(f"[Monitor] Subscriber error on {event}: {e}")
+
+    def start(self):
+        self.running = True
+        super().start()
+
+    def stop(self):
+        self.running = False
+        self.stop_event.set()
+        self.controller.inventory.invalidated.set()
+
+    def poke(self):
+        # Poll now and go back to the fast rate
+        self.interval = self.fast_interval
+        self.controller.inventory.invalidated.set()
+
+    def run(self):
+        invalidated = self.controller.inventory.invalidated
+        while self.running:
+            invalidated.clear()
+            try:
+                changed, booting = self.poll()
+            except Exception as e:
+                # No console path yet, dnconsole failing, ...
+                changed, booting = False, False
+                if self.last is not None:
+                    print(f"[Monitor] Poll failed: {e}")
+
+            if changed or booting:
+                self.interval = self.fast_interval
+            else:
+                self.interval = min(self.interval * self.backoff, self.slow_interval)
+
+            # Sleep, but wake up early on a mutating command or stop()
+            if invalidated.wait(self.interval):
+                self.interval = self.fast_interval
+                if self.stop_event.is_set():
+                    break
+                # Give the command a moment to take effect before polling
+                time.sleep(min(0.2, self.fast_interval))
+
+    def poll(self):
+        changes = self.controller.inventory.poll_changes("status_monitor", force=True)
+        current = changes['current']
+        first = self.last is None
+        self.last = current
+        booting = any(inst['running'] and not inst.get('android') for inst in current.values())
+        if first:
+            return False, booting # First poll is the baseline
+
+        for inst in changes['added']:
+            self.publish(EVENT_ADDED, inst)
+            if inst['running']:
+                self.publish(EVENT_STARTED, inst)
+
+        for old, inst in changes['changed']:
+            if inst['running'] and not old['running']:
+                self.publish(EVENT_STARTED, inst)
+            elif old['running'] and not inst['running']:
+                if self.controller.stop_was_requested(inst['index']):
+                    self.publish(EVENT_STOPPED, inst)
+                else:
+                    self.publish(EVENT_CRASHED, inst)
+            if inst.get('android') and not old.get('android'):
+                self.publish(EVENT_ANDROID_READY, inst)
+            if inst['name'] != old['name']:
+                self.publish(EVENT_RENAMED, inst)
+
+        for old in changes['removed']:
+            self.publish(EVENT_REMOVED, old)
+        changed = bool(changes['added'] or changes['changed'] or changes['removed'])
+        return changed, booting
@@ -0,0 +1,86 @@
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ld_controller import LDPlayerController, input_text_cmd
+
+
+def write_script(path, body):
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\n" + body)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+@unittest.skipIf(os.name == "nt" or not shutil.which("sh"), "needs a POSIX sh")
+class AdbPoolTest(unittest.TestCase):
+    # The pooled "adb shell" is a real sh; "input" prints its arguments and
+    # dnconsole logs its command line, so tests see what reached each of them
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        bin_dir = os.path.join(self.tmp, "bin")
+        os.mkdir(bin_dir)
+        write_script(os.path.join(bin_dir, "input"), 'printf "%s|" "$@"; echo\n')
+        self.log = os.path.join(self.tmp, "dnconsole.log")
+        self.console = write_script(os.path.join(self.tmp, "dnconsole"), f'echo "$@" >> "{self.log}"\n')
+        self.adb = write_script(os.path.join(self.tmp, "adb"), f'PATH="{bin_dir}:$PATH" exec sh\n')
+
+    def controller(self, adb=None):
+        controller = LDPlayerController(self.console, adb or self.adb)
+        self.addCleanup(controller.adb_pool.close_all)
+        return controller
+
+    def dnconsole_calls(self):
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log) as f:
+            return f.read().splitlines()
+
+    def test_input_text_with_shell_metacharacters(self):
+        controller = self.controller()
+        text = "I'm happy; rm -rf x & \"quoted\" $HOME `id`\nnext"
+        output = controller.run_adb_cmd(0, input_text_cmd(text), timeout=5)
+        self.assertEqual(output, "text|" + text.replace("\n", " ").replace(" ", "%s") + "|")
+        # Same session still answers, nothing went to dnconsole
+        self.assertEqual(controller.run_adb_cmd(0, "echo ok", timeout=5), "ok")
+        self.assertEqual(len(controller.adb_pool.sessions), 1)
+        self.assertEqual(self.dnconsole_calls(), [])
+
+    def test_unreachable_device_falls_back_to_dnconsole(self):
+        adb = write_script(os.path.join(self.tmp, "adb_missing"),
+                           "echo \"error: device 'emulator-5554' not found\"\nexit 1\n")
+        controller = self.controller(adb)
+        controller.run_adb_cmd(0, "echo ok", timeout=5)
+        controller.run_adb_cmd(0, "echo ok", timeout=5)
+        self.assertEqual(self.dnconsole_calls(), ['adb --index 0 --command "echo ok"'] * 2)
+        # Backing off: no new adb shell per call
+        self.assertIn("0", controller.adb_pool.failed_until)
+        self.assertEqual(controller.adb_pool.sessions, {})
+
+    def test_lost_command_is_not_sent_again(self):
+        controller = self.controller()
+        runs = os.path.join(self.tmp, "runs")
+        output = controller.run_adb_cmd(0, f"echo run >> {runs}; sleep 3", timeout=1)
+        self.assertEqual(output, "")
+        with open(runs) as f:
+            self.assertEqual(f.read().splitlines(), ["run"])
+        self.assertEqual(self.dnconsole_calls(), [])
+        # The next command gets a fresh session
+        self.assertEqual(controller.run_adb_cmd(0, "echo ok", timeout=5), "ok")
+
+    def test_batch_is_one_shell_call(self):
+        controller = self.controller()
+        with controller.batch(0) as b:
+            b.tap(1, 2).input_text("a b")
+        self.assertEqual(controller.metrics.snapshot()['operations']['adb_shell']['count'], 1)
+        self.assertEqual(self.dnconsole_calls(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
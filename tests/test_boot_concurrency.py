@@ -0,0 +1,52 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from automation_manager import BootConcurrency
+
+
+def record_all(control, boot_times, ok=True):
+    for seconds in boot_times:
+        control.record(seconds, ok)
+
+
+class BootConcurrencyTest(unittest.TestCase):
+    def test_grows_with_varying_boot_times(self):
+        rng = random.Random(1)
+        control = BootConcurrency(min_limit=1, max_limit=20)
+        record_all(control, [rng.lognormvariate(3.5, 0.25) for _ in range(400)])
+        self.assertEqual(control.allowed(), 20)
+
+    def test_one_fast_boot_does_not_mark_normal_boots_slow(self):
+        rng = random.Random(2)
+        control = BootConcurrency(min_limit=1, max_limit=10)
+        control.record(3.0) # e.g. an instance that was already half up
+        record_all(control, [rng.uniform(30, 40) for _ in range(100)])
+        self.assertEqual(control.allowed(), 10)
+
+    def test_probe_quantized_short_boots_still_grow(self):
+        # Readiness seen at 2.5s or 4.75s (wait_until_ready's probes) for ~2s boots
+        rng = random.Random(3)
+        control = BootConcurrency(min_limit=1, max_limit=10)
+        record_all(control, [rng.choice([2.5, 4.75]) for _ in range(100)])
+        self.assertEqual(control.allowed(), 10)
+
+    def test_slow_boots_shrink_the_limit(self):
+        control = BootConcurrency(min_limit=1, max_limit=16, initial=16)
+        record_all(control, [35] * 20)
+        control.record(120) # one slow boot only pauses growth
+        self.assertEqual(control.allowed(), 16)
+        record_all(control, [120] * 3)
+        self.assertEqual(control.allowed(), 2)
+
+    def test_failed_boots_shrink_to_min(self):
+        control = BootConcurrency(min_limit=2, max_limit=16, initial=16)
+        record_all(control, [60] * 10, ok=False)
+        self.assertEqual(control.allowed(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
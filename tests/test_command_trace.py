@@ -0,0 +1,87 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bench"))
+
+from command_runner import CommandResult
+from command_trace import TraceRecorder, read_trace, trace_counts
+from fake_ldplayer import FakeLDPlayer
+from replay_controller import ReplayController
+from sim_controller import SimulatedController
+
+
+def drive(controller):
+    # A short session: look, boot one instance, poke it, stop it
+    states = [controller.list_instances(force=True)]
+    controller.start_instance(1)
+    states.append(controller.list_instances())
+    controller.run_adb_cmd(1, "getprop sys.boot_completed")
+    controller.adb_tap(1, 10, 20)
+    controller.stop_instance(1)
+    states.append(controller.list_instances())
+    return states
+
+
+class CommandTraceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def round_trip(self, name):
+        path = os.path.join(self.tmp, name)
+        recorded = SimulatedController(FakeLDPlayer(instances=3))
+        recorded.start_trace(path)
+        expected = drive(recorded)
+        recorded.stop_trace()
+
+        entries = list(read_trace(path))
+        self.assertEqual(trace_counts(entries), {'list2': 3, 'launch': 1, 'adb': 2, 'quit': 1})
+        replay = ReplayController(path)
+        self.assertEqual(drive(replay), expected)
+        self.assertEqual(replay.compare(), {})
+        self.assertEqual(replay.unmatched, {})
+        self.assertTrue(expected[1][1]['running'])
+        self.assertFalse(expected[2][1]['running'])
+
+    def test_round_trip_jsonl(self):
+        self.round_trip("commands.trace")
+
+    def test_round_trip_gzip(self):
+        self.round_trip("commands.trace.gz")
+
+    def test_record_fields(self):
+        path = os.path.join(self.tmp, "fields.trace")
+        recorder = TraceRecorder(path)
+        recorder.record(['list2'], CommandResult(['list2'], returncode=0, stdout="0,a,0,0,0,-1,-1,0", duration=0.04))
+        recorder.record(['launch', '--index', '3'], CommandResult(['launch'], duration=30, timed_out=True, error="boom"))
+        recorder.close()
+        recorder.record(['quit'], CommandResult(['quit'], returncode=0)) # ignored after close
+        first, second = list(read_trace(path))
+        self.assertEqual((first['a'], first['o'], first['d']), (['list2'], "0,a,0,0,0,-1,-1,0", 40))
+        self.assertNotIn('rc', first)
+        self.assertEqual((second['a'], second['d'], second['to'], second['e']), (['launch', '--index', '3'], 30000, 1, "boom"))
+        self.assertNotIn('o', second)
+
+    def test_truncated_line_ends_trace(self):
+        path = os.path.join(self.tmp, "cut.trace")
+        recorder = TraceRecorder(path)
+        recorder.record(['list2'], CommandResult(['list2'], returncode=0))
+        recorder.close()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"t": 5, "a": ["la')
+        self.assertEqual([e['a'] for e in read_trace(path)], [['list2']])
+
+    def test_unknown_command_fails_in_replay(self):
+        replay = ReplayController([{'t': 0, 'a': ['list2'], 'd': 1}])
+        result = replay.start_instance(0)
+        self.assertFalse(result.ok)
+        self.assertEqual(replay.unmatched, {('launch', '--index', '0'): 1})
+        self.assertEqual(replay.compare(), {'launch': (0, 1), 'list2': (1, 0)})
+
+
+if __name__ == "__main__":
+    unittest.main()
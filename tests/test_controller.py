@@ -0,0 +1,60 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bench"))
+
+from command_runner import CommandResult
+from fake_ldplayer import FakeLDPlayer
+from sim_controller import SimulatedController
+
+
+class FlakyListController(SimulatedController):
+    # list2 times out for the first `failures` calls
+    def __init__(self, fleet, failures):
+        self.failures = failures
+        super().__init__(fleet, inventory_ttl=0)
+
+    def execute_command(self, cmd_args, timeout=None, cancel=None):
+        if cmd_args[0] == 'list2' and self.failures > 0:
+            self.failures -= 1
+            result = CommandResult(list(cmd_args), duration=timeout or 0, timed_out=True)
+            self._after_command(list(cmd_args), result)
+            return result
+        return super().execute_command(cmd_args, timeout=timeout, cancel=cancel)
+
+
+class ControllerTest(unittest.TestCase):
+    def test_failed_list2_is_not_ready(self):
+        controller = FlakyListController(FakeLDPlayer(instances=1, running=True), failures=2)
+        self.assertFalse(controller.is_ready(0))
+        self.assertTrue(controller.wait_until_ready(0, timeout=5, initial_delay=0.01, max_delay=0.01))
+        self.assertEqual(controller.failures, 0)
+
+    def test_failed_list2_raises_instead_of_empty_list(self):
+        controller = FlakyListController(FakeLDPlayer(instances=1), failures=1)
+        with self.assertRaises(RuntimeError):
+            controller.list_instances()
+        self.assertEqual(len(controller.list_instances()), 1)
+
+    def test_plan_modify_skips_unchanged_instances(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        config_dir = os.path.join(tmp, "vms", "config")
+        os.makedirs(config_dir)
+        for index, cpu in ((0, 2), (1, 4)):
+            with open(os.path.join(config_dir, f"leidian{index}.config"), "w") as f:
+                json.dump({"advancedSettings.cpuCount": cpu, "advancedSettings.memorySize": 2048}, f)
+        controller = SimulatedController(FakeLDPlayer(instances=3))
+        controller.console_path = os.path.join(tmp, "dnconsole.exe")
+        self.assertEqual(controller.plan_modify([0, 1, 2], 2, 2048), (["1", "2"], ["0"]))
+        self.assertEqual(controller.get_instance_budget(1), {'cpu': 4, 'memory': 2048})
+        self.assertEqual([c['index'] for c in controller.list_configured()], ["0", "1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bench"))
+
+from inventory import InstanceInventory, diff_snapshots
+from fake_ldplayer import FakeLDPlayer
+from sim_controller import SimulatedController
+
+
+def instance(index, running=False):
+    return {'index': index, 'name': f"LDPlayer-{index}", 'running': running}
+
+
+class InstanceInventoryTest(unittest.TestCase):
+    def setUp(self):
+        self.fetches = 0
+        self.instances = [instance("0"), instance("1")]
+        self.inventory = InstanceInventory(self.fetch, ttl=60)
+
+    def fetch(self):
+        self.fetches += 1
+        return [dict(inst) for inst in self.instances]
+
+    def test_cached_until_invalidated(self):
+        self.inventory.get()
+        self.inventory.get()
+        self.assertEqual(self.fetches, 1)
+        self.assertFalse(self.inventory.invalidated.is_set())
+        self.inventory.invalidate()
+        self.assertTrue(self.inventory.invalidated.is_set())
+        self.inventory.get()
+        self.assertEqual(self.fetches, 2)
+        self.inventory.get(force=True)
+        self.assertEqual(self.fetches, 3)
+
+    def test_callers_get_copies(self):
+        self.inventory.get()[0]['running'] = True
+        self.assertFalse(self.inventory.get()[0]['running'])
+
+    def test_poll_changes_per_consumer(self):
+        first = self.inventory.poll_changes("a")
+        self.assertEqual(len(first['added']), 2)
+        self.instances = [instance("0", running=True), instance("2")]
+        changes = self.inventory.poll_changes("a", force=True)
+        self.assertEqual([i['index'] for i in changes['added']], ["2"])
+        self.assertEqual([i['index'] for i in changes['removed']], ["1"])
+        self.assertEqual([(old['running'], new['running']) for old, new in changes['changed']], [(False, True)])
+        self.assertEqual(sorted(changes['current']), ["0", "2"])
+        # Another consumer still starts from nothing
+        self.assertEqual(len(self.inventory.poll_changes("b")['added']), 2)
+
+    def test_diff_snapshots_unchanged(self):
+        snapshot = {"0": instance("0")}
+        self.assertEqual(diff_snapshots(snapshot, dict(snapshot)), {'added': [], 'removed': [], 'changed': []})
+
+    def test_mutating_command_invalidates_controller_inventory(self):
+        controller = SimulatedController(FakeLDPlayer(instances=2), inventory_ttl=60)
+        self.assertFalse(controller.list_instances()[0]['running'])
+        controller.list_instances()
+        self.assertEqual(controller.fleet.counts['list2'], 1)
+        controller.start_instance(0)
+        self.assertTrue(controller.inventory.invalidated.is_set())
+        self.assertTrue(controller.list_instances()[0]['running'])
+        self.assertEqual(controller.fleet.counts['list2'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ld_controller import parse_list2
+from instance_config import InstanceConfigReader, parse_instance_config
+
+
+class ParseList2Test(unittest.TestCase):
+    def test_states_and_order(self):
+        output = "\n".join([
+            "10,Ten,0,0,0,-1,-1,0",
+            "2,Two,1234,5678,1,4321,8765,0",
+            "1,One,1234,5678,0,0,8765,0", # VBox up, Android still booting
+            "3,Three,0,0,1,-1,-1,0", # stale EnterAndroid on a stopped instance
+            "garbage",
+            ""
+        ])
+        instances = parse_list2(output)
+        self.assertEqual([i['index'] for i in instances], ["1", "2", "3", "10"])
+        states = {i['index']: (i['running'], i['android']) for i in instances}
+        self.assertEqual(states, {"1": (True, False), "2": (True, True), "3": (False, False), "10": (False, False)})
+        self.assertEqual(instances[1]['name'], "Two")
+
+    def test_empty(self):
+        self.assertEqual(parse_list2(""), [])
+        self.assertEqual(parse_list2(None), [])
+
+
+class ParseInstanceConfigTest(unittest.TestCase):
+    def test_flat_keys(self):
+        config = parse_instance_config(3, {
+            "statusSettings.playerName": "Farm 3",
+            "advancedSettings.cpuCount": 4,
+            "advancedSettings.memorySize": "4096",
+            "advancedSettings.resolution": {"width": 720, "height": 1280},
+            "advancedSettings.resolutionDpi": 320
+        })
+        self.assertEqual(config, {'index': "3", 'name': "Farm 3", 'cpu': 4, 'memory': 4096, 'resolution': "720,1280,320"})
+
+    def test_nested_keys(self):
+        config = parse_instance_config(0, {"advancedSettings": {"cpuCount": 2, "memorySize": 2048}})
+        self.assertEqual((config['name'], config['cpu'], config['memory'], config['resolution']),
+                         ("LDPlayer", 2, 2048, None))
+
+    def test_malformed_values_are_unknown(self):
+        for data in ({"advancedSettings.cpuCount": None, "advancedSettings.memorySize": "lots",
+                      "advancedSettings.resolution": [720, 1280], "statusSettings.playerName": 5},
+                     {"advancedSettings.resolution": {"width": None, "height": {}},
+                      "advancedSettings.resolutionDpi": "x"},
+                     [], None, "text"):
+            config = parse_instance_config(7, data)
+            self.assertEqual(config, {'index': "7", 'name': "LDPlayer-7", 'cpu': None, 'memory': None, 'resolution': None})
+
+
+class InstanceConfigReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.reader = InstanceConfigReader(self.tmp)
+
+    def write(self, index, text):
+        path = os.path.join(self.tmp, f"leidian{index}.config")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_reparses_only_changed_files(self):
+        self.write(0, json.dumps({"advancedSettings.cpuCount": 2}))
+        self.write(1, json.dumps({"advancedSettings.cpuCount": 4}))
+        with open(os.path.join(self.tmp, "leidians.config"), "w") as f:
+            f.write("{}")
+        self.assertEqual({i: c['cpu'] for i, c in self.reader.read_all().items()}, {"0": 2, "1": 4})
+        cached = self.reader.cache["0"][1]
+        self.reader.read_all()
+        self.assertIs(self.reader.cache["0"][1], cached)
+
+        self.write(0, json.dumps({"advancedSettings.cpuCount": 8, "advancedSettings.memorySize": 4096}))
+        self.assertEqual(self.reader.get(0)['cpu'], 8)
+        os.remove(os.path.join(self.tmp, "leidian1.config"))
+        self.assertEqual(list(self.reader.read_all()), ["0"])
+        self.assertNotIn("1", self.reader.cache)
+
+    def test_half_written_file_keeps_last_config(self):
+        self.write(0, json.dumps({"advancedSettings.cpuCount": 2}))
+        self.assertEqual(self.reader.get(0)['cpu'], 2)
+        self.write(0, '{"advancedSettings.cpuCount": ')
+        self.assertEqual(self.reader.get(0)['cpu'], 2)
+        self.assertIsNone(self.reader.get(5))
+
+    def test_missing_directory(self):
+        self.assertEqual(InstanceConfigReader(None).read_all(), {})
+        self.assertEqual(InstanceConfigReader(os.path.join(self.tmp, "nope")).read_all(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from automation_manager import JobQueue
+from cancel_token import CancelToken, CommandCancelled
+
+
+class JobQueueTest(unittest.TestCase):
+    def test_priority_then_fifo(self):
+        queue = JobQueue()
+        queue.push("1")
+        queue.push("2", priority=5)
+        queue.push("3")
+        queue.push("4", priority=5)
+        self.assertEqual(list(queue), ["2", "4", "1", "3"])
+        self.assertEqual(queue.peek_ready(0), "2")
+
+    def test_backoff_skips_to_next_ready_job(self):
+        queue = JobQueue()
+        queue.push("1", priority=5, not_before=100)
+        queue.push("2")
+        self.assertEqual(queue.peek_ready(50), "2")
+        queue.pop("2")
+        self.assertIsNone(queue.peek_ready(50))
+        self.assertEqual(queue.next_ready_time(), 100)
+        self.assertEqual(queue.peek_ready(100), "1")
+
+    def test_remove_and_requeue(self):
+        queue = JobQueue()
+        queue.push("1", priority=5)
+        queue.push("2")
+        self.assertTrue(queue.remove("1"))
+        self.assertFalse(queue.remove("1"))
+        self.assertNotIn("1", queue)
+        self.assertEqual(queue.peek_ready(0), "2")
+        # A re-push replaces the old entry instead of adding a second one
+        queue.push("2", not_before=10)
+        self.assertEqual(len(queue), 1)
+        self.assertIsNone(queue.peek_ready(0))
+        self.assertEqual(queue.peek_ready(10), "2")
+        queue.pop("2")
+        self.assertEqual(len(queue), 0)
+        self.assertIsNone(queue.next_ready_time())
+
+
+class CancelTokenTest(unittest.TestCase):
+    def test_cancel_reaches_children(self):
+        parent = CancelToken()
+        child = parent.child()
+        grandchild = child.child()
+        parent.cancel()
+        self.assertTrue(child.cancelled)
+        self.assertTrue(grandchild.cancelled)
+        with self.assertRaises(CommandCancelled):
+            grandchild.check()
+
+    def test_child_cancel_leaves_parent(self):
+        parent = CancelToken()
+        child = parent.child()
+        child.cancel()
+        self.assertFalse(parent.cancelled)
+        parent.check()
+
+    def test_child_of_cancelled_token_starts_cancelled(self):
+        parent = CancelToken()
+        parent.cancel()
+        self.assertTrue(parent.child().cancelled)
+
+    def test_wait_returns_when_cancelled(self):
+        token = CancelToken()
+        self.assertFalse(token.wait(0.01))
+        timer = threading.Timer(0.05, token.cancel)
+        timer.start()
+        self.assertTrue(token.wait(5))
+        timer.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,9 +2,19 @@ import customtkinter as ctk
 import os
 import ctypes
 import sys
+import threading
 from tkinter import filedialog, messagebox, Menu
 from ld_controller import LDPlayerController
 from automation_manager import AutomationManager
+from virtual_list import VirtualList
+from selection_model import SelectionModel
+from status_monitor import StatusMonitor
+from host_stats import AdmissionControl
+from ui_dispatcher import UIDispatcher
+from instance_log import InstanceLogStore
+from log_panel import LogPanel
+from stats_panel import StatsPanel
+from command_metrics import MetricsExporter
 from PIL import Image
 
 # Replicate the dark theme from the image
@@ -14,6 +24,34 @@ ACCENT_COLOR = "#3b8ed0" # Blue accent
 TEXT_COLOR = "#ffffff"
 GRID_HEADER_COLOR = "#1f202e"
 
+# Bulk start/stop/delete/modify
+BULK_WORKERS = 4
+BULK_START_RATE = 1 # launches per second, keeps the disk from being swamped on big batches
+BULK_STATUS_TEXT = {
+    "start": ("Starting", "Running"),
+    "stop": ("Stopping", "Stopped"),
+    "remove": ("Deleting", "Deleted"),
+    "modify": ("Applying", "Applied"),
+}
+BULK_STATUS_HOLD_MS = 3000 # how long a finished action's status is shown before the real state again
+
+# Updates from worker threads are applied in batches at this rate
+UI_FPS = 30
+
+# Per-instance task logs: lines kept in memory per instance, and where the
+# rotating log files go (None = memory only)
+LOG_LINES_PER_INSTANCE = 500
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+
+# Command latency metrics are written here every METRICS_EXPORT_INTERVAL
+# seconds, Prometheus text format (use a .json name for JSON, None = off)
+METRICS_FILE = os.path.join(LOG_DIR, "metrics.prom")
+METRICS_EXPORT_INTERVAL = 30
+
+# Every dnconsole/adb command and its output is appended here when set, for
+# replaying with bench/replay_controller.py, e.g. os.path.join(LOG_DIR, "commands.trace.gz")
+TRACE_FILE = None
+
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
@@ -26,9 +64,42 @@ class LDManagerApp(ctk.CTk):
         self.configure(fg_color=THEME_COLOR) # Set main background
         
         self.controller = LDPlayerController()
-        self.automation = AutomationManager(self.controller, self.update_timer)
+        self.controller.bulk_workers = BULK_WORKERS
+        if TRACE_FILE:
+            os.makedirs(os.path.dirname(TRACE_FILE), exist_ok=True)
+            self.controller.start_trace(TRACE_FILE)
+        
+        # Only the Tk thread touches widgets, other threads go through self.ui
+        self.ui = UIDispatcher(self, fps=UI_FPS)
+        # Row registry for the sidebar "Active Devices" list (running only),
+        # index -> {'frame', 'inst', widgets...}, reconciled on refresh
+        self.active_rows = {}
+        self.device_status_override = {} # index -> status text shown while a bulk action runs
+        
+        # Selected indices, shared by the lists and the action handlers
+        self.device_selection = SelectionModel() # Devices tab
+        self.active_selection = SelectionModel() # Active tab
+        self.active_selection.subscribe(self.update_active_selection_count)
+        
+        # Background list2 poller, its events drive list refreshes (one per frame at most)
+        self.monitor = StatusMonitor(self.controller)
+        self.monitor.subscribe(lambda event, inst: self.ui.post(self.refresh_instances, key="refresh_instances"))
+        
+        # What each instance's task runner is doing, shown by the Logs panel
+        self.logs = InstanceLogStore(max_lines=LOG_LINES_PER_INSTANCE, log_dir=LOG_DIR)
+        self.log_panel = None
+        self.stats_panel = None
+        self.metrics_exporter = None
+        if METRICS_FILE:
+            self.metrics_exporter = MetricsExporter(self.controller.metrics, METRICS_FILE, METRICS_EXPORT_INTERVAL)
+            self.metrics_exporter.start()
+        
+        self.automation = AutomationManager(self.controller, self.update_timer, log_callback=self.logs.append, monitor=self.monitor,
+                                            admission=AdmissionControl(), status_callback=self.update_queue_status)
         
         self.setup_ui()
+        self.ui.start()
+        self.monitor.start()
         
         # Initial check
         if not self.controller.console_path:
@@ -37,28 +108,31 @@ class LDManagerApp(ctk.CTk):
             self.refresh_instances()
 
     def update_timer(self, time_str):
-        self.timer_label.configure(text=time_str)
+        # Called from the automation timer thread
+        self.ui.configure(self.timer_label, text=time_str)
+
+    def update_queue_status(self, reason):
+        # Called from the scheduler thread
+        self.ui.configure(self.lbl_queue_status, text=f"Queue paused: {reason}" if reason else "")
 
     def warn_path(self):
          messagebox.showwarning("Setup", "Please set LDPlayer dnconsole.exe path via 'Browse' button.")
 
     def start_automation_click(self):
         # 1. Get Selected Devices from Active Tab
-        selected_indices = []
-        for child in self.active_device_list.winfo_children():
-            try:
-                # Structure: Frame -> [Checkbox, Label(Index), Label(Name)]
-                checkbox = child.winfo_children()[0]
-                if checkbox.get() == 1:
-                    index_label = child.winfo_children()[1]
-                    selected_indices.append(index_label.cget("text"))
-            except:
-                pass
+        selected_indices = self.active_selection.get()
         
         if not selected_indices:
             messagebox.showwarning("Warning", "No devices selected in Active tab!")
             return
 
+        # Already running: sync the run with the current selection instead of restarting
+        if self.automation.running:
+            queued = self.automation.queued_indices()
+            self.automation.remove_instances([idx for idx in queued if idx not in self.active_selection])
+            self.automation.add_instances(selected_indices)
+            return
+
         # 2. Get Max Active Count & Delays
         max_active = self.active_limit_combo.get()
         
@@ -70,6 +144,11 @@ class LDManagerApp(ctk.CTk):
         boot_delay = 60
         try: boot_delay = int(self.delay_boot_entry.get())
         except: pass
+        
+        # Upper bound for adaptive parallel boots (empty = Number of active LD)
+        max_boots = None
+        try: max_boots = int(self.max_boots_entry.get())
+        except: pass
 
         # 3. Gather Active Task Settings
         task_settings = {}
@@ -87,7 +166,7 @@ class LDManagerApp(ctk.CTk):
         # Check if "Enable Active" is allowed (optional logic)
         # enable_active = self.chk_enable_active.get() == 1
 
-        self.automation.start_automation(selected_indices, max_active, interval_delay, boot_delay, task_settings)
+        self.automation.start_automation(selected_indices, max_active, interval_delay, boot_delay, task_settings, max_boots=max_boots)
 
     def stop_automation_click(self):
         self.automation.stop_automation()
@@ -128,6 +207,10 @@ class LDManagerApp(ctk.CTk):
         self.timer_label = ctk.CTkLabel(self.timer_frame, text="00:00:00", font=("Consolas", 32, "bold"), text_color="#a0a0a0")
         self.timer_label.pack(side="right", padx=10)
         
+        # Why the automation queue is not launching (slots, boot limit, RAM/CPU)
+        self.lbl_queue_status = ctk.CTkLabel(self.left_panel, text="", font=("Arial", 11), text_color="#e67e22", anchor="w", wraplength=270, justify="left")
+        self.lbl_queue_status.pack(fill="x", padx=15)
+        
         # 1.2 "Active Devices" Header
         self.lbl_active = ctk.CTkLabel(self.left_panel, text="Active Devices", font=("Arial", 14), text_color="gray", anchor="w")
         self.lbl_active.pack(fill="x", padx=15, pady=(20, 5))
@@ -150,7 +233,20 @@ class LDManagerApp(ctk.CTk):
         
         ctk.CTkButton(footer, text="API", width=60, height=25, fg_color="#2b2d3e", border_width=1, border_color="gray").pack(side="left", padx=2)
         ctk.CTkButton(footer, text="LD Group", width=70, height=25, fg_color="#3b8ed0").pack(side="left", padx=2)
-        ctk.CTkButton(footer, text="Logs", width=60, height=25, fg_color="#2b2d3e", border_width=1, border_color="gray").pack(side="left", padx=2)
+        ctk.CTkButton(footer, text="Logs", width=60, height=25, fg_color="#2b2d3e", border_width=1, border_color="gray", command=self.open_log_panel).pack(side="left", padx=2)
+        ctk.CTkButton(footer, text="Stats", width=60, height=25, fg_color="#2b2d3e", border_width=1, border_color="gray", command=self.open_stats_panel).pack(side="left", padx=2)
+
+    def open_log_panel(self):
+        if self.log_panel is not None and self.log_panel.winfo_exists():
+            self.log_panel.focus()
+            return
+        self.log_panel = LogPanel(self, self.logs)
+
+    def open_stats_panel(self):
+        if self.stats_panel is not None and self.stats_panel.winfo_exists():
+            self.stats_panel.focus()
+            return
+        self.stats_panel = StatsPanel(self, self.controller.metrics, export_path=METRICS_FILE)
 
     def setup_right_panel(self):
         # 2.1 Tab View
@@ -322,8 +418,9 @@ class LDManagerApp(ctk.CTk):
         ctk.CTkLabel(r_head, text="ID", width=30).pack(side="left", padx=5)
         ctk.CTkLabel(r_head, text="LD Name", width=150, anchor="w").pack(side="left", padx=5)
         
-        # List
-        self.active_device_list = ctk.CTkScrollableFrame(device_select_frame)
+        # List (virtualized, only visible rows have widgets)
+        self.active_device_list = VirtualList(device_select_frame, self.create_active_tab_row, self.bind_active_tab_row,
+                                              key=lambda inst: inst['index'], selection=self.active_selection)
         self.active_device_list.pack(fill="both", expand=True)
         
         # Footer
@@ -336,47 +433,76 @@ class LDManagerApp(ctk.CTk):
         self.refresh_active_tab_list()
 
     def toggle_select_active_all(self):
-        state = self.chk_active_select_all.get()
-        for child in self.active_device_list.winfo_children():
-            try:
-                chk = child.winfo_children()[0]
-                if state == 1:
-                    chk.select()
-                else:
-                    chk.deselect()
-            except:
-                pass
-        self.update_active_selection_count()
-
-    def update_active_selection_count(self):
-        count = 0
-        for child in self.active_device_list.winfo_children():
-             try:
-                chk = child.winfo_children()[0]
-                if chk.get() == 1: count += 1
-             except: pass
-        self.lbl_active_selected.configure(text=f"{count} Selected")
-
-    def refresh_active_tab_list(self):
-        # Save current selections? (Optional, skipping for simplicity)
-        for widget in self.active_device_list.winfo_children():
-            widget.destroy()
-            
+        if self.chk_active_select_all.get() == 1:
+            self.active_device_list.select_all()
+        else:
+            self.active_device_list.clear_selection()
+
+    def update_active_selection_count(self, added=None, removed=None):
+        # Selection model observer, len() is O(1)
+        self.lbl_active_selected.configure(text=f"{len(self.active_selection)} Selected")
+
+    def refresh_active_tab_list(self, instances=None):
+        # Selection lives in the list model, so it survives refreshes
         try:
-            instances = self.controller.list_instances()
-            for inst in instances:
-                row = ctk.CTkFrame(self.active_device_list, fg_color="transparent")
-                row.pack(fill="x", pady=1)
-                
-                chk = ctk.CTkCheckBox(row, text="", width=20, command=self.update_active_selection_count)
-                chk.pack(side="left", padx=5)
-                
-                ctk.CTkLabel(row, text=inst['index'], width=30).pack(side="left")
-                ctk.CTkLabel(row, text=inst['name'], anchor="w").pack(side="left", padx=10)
-                
+            if instances is None:
+                instances = self.controller.list_instances()
+            self.active_device_list.set_items(instances)
         except:
              pass
-        self.update_active_selection_count()
+
+    def create_active_tab_row(self, frame, row):
+        chk = ctk.CTkCheckBox(frame, text="", width=20,
+                              command=lambda: self.active_selection.set(row['key'], chk.get() == 1))
+        chk.pack(side="left", padx=5)
+        
+        row['index'] = ctk.CTkLabel(frame, width=30)
+        row['index'].pack(side="left")
+        row['name'] = ctk.CTkLabel(frame, anchor="w")
+        row['name'].pack(side="left", padx=10)
+        row['chk'] = chk
+
+    def bind_active_tab_row(self, row, inst):
+        row['index'].configure(text=inst['index'])
+        row['name'].configure(text=inst['name'])
+        if inst['index'] in self.active_selection:
+            row['chk'].select()
+        else:
+            row['chk'].deselect()
+
+    def reconcile_rows(self, rows, instances, create, update):
+        # Brings a row registry in line with instances: creates rows for new
+        # indices, updates rows whose instance data changed and destroys rows
+        # for indices that are gone. Unchanged rows are not touched.
+        seen = set()
+        created = set()
+        for inst in instances:
+            idx = inst['index']
+            seen.add(idx)
+            row = rows.get(idx)
+            if row is None:
+                row = create(inst)
+                rows[idx] = row
+                created.add(idx)
+            elif row['inst'] != inst:
+                update(row, inst)
+            row['inst'] = inst
+        
+        for idx in [i for i in rows if i not in seen]:
+            rows.pop(idx)['frame'].destroy()
+        
+        # New rows are packed at the end, move them into index order
+        if created and len(created) < len(rows):
+            order = [inst['index'] for inst in instances]
+            for pos, idx in enumerate(order):
+                if idx not in created:
+                    continue
+                if pos > 0:
+                    rows[idx]['frame'].pack_configure(after=rows[order[pos - 1]]['frame'])
+                else:
+                    first_old = next(i for i in order if i not in created)
+                    rows[idx]['frame'].pack_configure(before=rows[first_old]['frame'])
+
     def build_devices_tab(self, parent):
         # Need a grid layout inside: Main list on left, Settings sidebar on right
         parent.grid_columnconfigure(0, weight=1) # Main list
@@ -418,6 +544,10 @@ class LDManagerApp(ctk.CTk):
         self.delay_interval_entry = ctk.CTkEntry(setup_frame, width=50, placeholder_text="40")
         self.delay_interval_entry.pack(side="left")
         
+        ctk.CTkLabel(setup_frame, text="Max parallel boots").pack(side="left", padx=(15,5))
+        self.max_boots_entry = ctk.CTkEntry(setup_frame, width=50, placeholder_text="auto")
+        self.max_boots_entry.pack(side="left")
+        
         # --- Left: Devices List ---
         list_container = ctk.CTkFrame(parent, fg_color="transparent")
         list_container.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
@@ -430,8 +560,9 @@ class LDManagerApp(ctk.CTk):
         ctk.CTkLabel(lh, text="Status", width=60).pack(side="left", padx=5)
         ctk.CTkLabel(lh, text="Actions", width=100).pack(side="left", padx=5)
         
-        # Scrollable List
-        self.device_list_scroll = ctk.CTkScrollableFrame(list_container)
+        # Scrollable List (virtualized, only visible rows have widgets)
+        self.device_list_scroll = VirtualList(list_container, self.create_device_row, self.bind_device_row,
+                                              key=lambda inst: inst['index'], selection=self.device_selection)
         self.device_list_scroll.pack(fill="both", expand=True)
 
         # --- Right: LDPlayer Setting Sidebar ---
@@ -493,7 +624,7 @@ class LDManagerApp(ctk.CTk):
         ctk.CTkCheckBox(settings_bar, text="Auto fit Screen").pack(pady=5, anchor="w", padx=10)
         
         # Refresh Button
-        ctk.CTkButton(settings_bar, text="Refresh List", fg_color="green", command=self.refresh_instances).pack(pady=20, padx=10, side="bottom")
+        ctk.CTkButton(settings_bar, text="Refresh List", fg_color="green", command=lambda: self.refresh_instances(force=True)).pack(pady=20, padx=10, side="bottom")
 
 
     def browse_ld(self):
@@ -503,28 +634,24 @@ class LDManagerApp(ctk.CTk):
             self.path_entry.insert(0, path)
             self.controller.console_path = path
             self.refresh_instances()
+            self.monitor.poke()
             
-    def refresh_instances(self):
-        # Clear main list
-        for widget in self.device_list_scroll.winfo_children():
-            widget.destroy()
-        
-        # Clear active list
-        for widget in self.active_scroll.winfo_children():
-            widget.destroy()
-            
+    def refresh_instances(self, force=False):
+        # Only rows whose instance appeared, vanished or changed are touched
         try:
-            instances = self.controller.list_instances()
-            for inst in instances:
-                # Add to main list
-                self.create_device_row(inst)
-                
-                # Add to active list if running
-                if inst['running']:
-                    self.create_active_row(inst)
+            instances = self.controller.list_instances(force)
+            
+            # Main list, a bulk status stays until the instance's real state changes
+            # (or BULK_STATUS_HOLD_MS after the action finished, see show_bulk_result)
+            for idx in self.device_list_scroll.set_items(instances):
+                self.device_status_override.pop(idx, None)
+            
+            # Active list (running only)
+            running = [inst for inst in instances if inst['running']]
+            self.reconcile_rows(self.active_rows, running, self.create_active_row, self.update_active_row)
             
             # Also refresh the Active Tab list (right side)
-            self.refresh_active_tab_list()
+            self.refresh_active_tab_list(instances)
 
         except Exception as e:
             print(e)
@@ -536,55 +663,72 @@ class LDManagerApp(ctk.CTk):
         # No. (just using index for now, or could be a counter)
         ctk.CTkLabel(row, text=inst['index'], width=30, anchor="w", font=("Arial", 11)).pack(side="left", padx=0)
         # LD Name
-        # Truncate if too long
-        name = inst['name']
-        if len(name) > 12: name = name[:10] + ".."
-        ctk.CTkLabel(row, text=name, width=80, anchor="w", font=("Arial", 11)).pack(side="left", padx=5)
+        name_lbl = ctk.CTkLabel(row, text=self.short_name(inst['name']), width=80, anchor="w", font=("Arial", 11))
+        name_lbl.pack(side="left", padx=5)
         # ID
         ctk.CTkLabel(row, text=inst['index'], width=30, anchor="w", font=("Arial", 11)).pack(side="left", padx=0)
         # Activity
         ctk.CTkLabel(row, text="Running", width=50, anchor="w", text_color="#2ecc71", font=("Arial", 11)).pack(side="left", padx=5)
+        return {'frame': row, 'name': name_lbl}
 
-    def create_device_row(self, inst):
-        row = ctk.CTkFrame(self.device_list_scroll, fg_color="transparent")
-        row.pack(fill="x", pady=2)
-        
+    def update_active_row(self, row, inst):
+        row['name'].configure(text=self.short_name(inst['name']))
+
+    def short_name(self, name):
+        # Truncate if too long
+        if len(name) > 12: name = name[:10] + ".."
+        return name
+
+    def create_device_row(self, frame, row):
         # Checkbox for selection
-        chk = ctk.CTkCheckBox(row, text="", width=20)
+        chk = ctk.CTkCheckBox(frame, text="", width=20,
+                              command=lambda: self.device_selection.set(row['key'], chk.get() == 1))
         chk.pack(side="left", padx=5)
         
-        ctk.CTkLabel(row, text=inst['index'], width=40).pack(side="left", padx=5)
-        ctk.CTkLabel(row, text=inst['name'], width=150, anchor="w").pack(side="left", padx=5)
+        row['chk'] = chk
+        row['index'] = ctk.CTkLabel(frame, width=40)
+        row['index'].pack(side="left", padx=5)
+        row['name'] = ctk.CTkLabel(frame, width=150, anchor="w")
+        row['name'].pack(side="left", padx=5)
         
-        status_col = "#2ecc71" if inst['running'] else "#e74c3c"
-        ctk.CTkLabel(row, text="●", text_color=status_col, width=20).pack(side="left")
-        ctk.CTkLabel(row, text="Running" if inst['running'] else "Stopped", width=50, font=("Arial", 10)).pack(side="left")
+        row['dot'] = ctk.CTkLabel(frame, text="●", width=20)
+        row['dot'].pack(side="left")
+        row['status'] = ctk.CTkLabel(frame, width=50, font=("Arial", 10))
+        row['status'].pack(side="left")
         
         # Actions
+        row['btn'] = ctk.CTkButton(frame, width=50, height=20)
+        row['btn'].pack(side="left", padx=5)
+
+    def bind_device_row(self, row, inst):
+        idx = inst['index']
+        if idx in self.device_selection:
+            row['chk'].select()
+        else:
+            row['chk'].deselect()
+        row['index'].configure(text=idx)
+        row['name'].configure(text=inst['name'])
         if inst['running']:
-            ctk.CTkButton(row, text="Stop", width=50, height=20, fg_color="#c0392b", command=lambda i=inst['index']: self.toggle_instance(i, False)).pack(side="left", padx=5)
+            row['dot'].configure(text_color="#2ecc71")
+            row['status'].configure(text="Running")
+            row['btn'].configure(text="Stop", fg_color="#c0392b", command=lambda: self.toggle_instance(idx, False))
         else:
-            ctk.CTkButton(row, text="Start", width=50, height=20, fg_color="#27ae60", command=lambda i=inst['index']: self.toggle_instance(i, True)).pack(side="left", padx=5)
+            row['dot'].configure(text_color="#e74c3c")
+            row['status'].configure(text="Stopped")
+            row['btn'].configure(text="Start", fg_color="#27ae60", command=lambda: self.toggle_instance(idx, True))
+        if idx in self.device_status_override:
+            row['status'].configure(text=self.device_status_override[idx])
 
     def toggle_instance(self, index, start):
         if start:
             self.controller.start_instance(index)
         else:
             self.controller.stop_instance(index)
-        self.after(500, self.refresh_instances)
+        # The status monitor picks up the change and refreshes the lists
 
     def apply_config(self):
         # 1. Gather Selected Instances
-        selected_indices = []
-        for child in self.device_list_scroll.winfo_children():
-            # Structure: Frame -> [Checkbox, Label(Index), ...]
-            try:
-                chk = child.winfo_children()[0]
-                if isinstance(chk, ctk.CTkCheckBox) and chk.get() == 1:
-                    idx_lbl = child.winfo_children()[1]
-                    selected_indices.append(idx_lbl.cget("text"))
-            except:
-                pass
+        selected_indices = self.device_selection.get()
         
         target_indices = selected_indices
         confirm_msg = f"Apply config (CPU/RAM/Res) to {len(target_indices)} selected instances?"
@@ -592,8 +736,8 @@ class LDManagerApp(ctk.CTk):
         if not target_indices:
             if not messagebox.askyesno("Confirm", "No devices selected. Apply to ALL devices?"):
                 return
-            # Get all
-            target_indices = [inst['index'] for inst in self.controller.list_instances()]
+            # Get all, from the config files (no dnconsole call)
+            target_indices = [inst['index'] for inst in self.controller.list_configured()]
             confirm_msg = "Apply config to ALL instances?"
         
         cpu_str = self.combo_cpu.get().split()[0]
@@ -601,45 +745,82 @@ class LDManagerApp(ctk.CTk):
         res_str = self.combo_res.get()
         
         if messagebox.askyesno("Apply Config", f"{confirm_msg}\nCPU: {cpu_str}, RAM: {ram_str}M, Res: {res_str}"):
-            for idx in target_indices:
-                self.controller.modify_instance(idx, int(cpu_str), int(ram_str), res_str)
-            messagebox.showinfo("Done", "Configuration applied.")
+            # Only instances whose current settings differ get a modify
+            to_modify, unchanged = self.controller.plan_modify(target_indices, cpu_str, ram_str, res_str)
+            if not to_modify:
+                messagebox.showinfo("Done", f"All {len(unchanged)} instances already have this configuration.")
+                return
+
+            def on_done(results):
+                failed = len([r for r in results if not r['success']])
+                messagebox.showinfo("Done", f"Configuration applied to {len(results) - failed} instances ({failed} failed), "
+                                            f"{len(unchanged)} already up to date.")
+
+            self.run_bulk_async("modify", to_modify, on_done, cpu=int(cpu_str), memory=int(ram_str), resolution=res_str)
             
     def batch_action(self, action):
-        selected_indices = []
-        for child in self.device_list_scroll.winfo_children():
-            try:
-                chk = child.winfo_children()[0]
-                if isinstance(chk, ctk.CTkCheckBox) and chk.get() == 1:
-                    idx_lbl = child.winfo_children()[1]
-                    selected_indices.append(idx_lbl.cget("text"))
-            except:
-                pass
+        selected_indices = self.device_selection.get()
                 
         if not selected_indices:
             messagebox.showwarning("Batch Action", "No devices selected.")
             return
 
-        if action == "start":
-            for idx in selected_indices:
-                self.controller.start_instance(idx)
-        elif action == "stop":
-            for idx in selected_indices:
-                self.controller.stop_instance(idx)
-        elif action == "delete":
-            if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {len(selected_indices)} instances?"):
-                 for idx in selected_indices:
-                    self.controller.remove_instance(idx)
-        
-        self.after(500, self.refresh_instances)
-        self.after(2000, self.refresh_instances)
+        if action == "delete":
+            if not messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {len(selected_indices)} instances?"):
+                return
+            action = "remove"
+
+        def on_done(results):
+            # Later state changes (VM actually up, ...) arrive as monitor events
+            self.refresh_instances()
+
+        self.run_bulk_async(action, selected_indices, on_done)
+
+    def run_bulk_async(self, action, indices, on_done=None, **kwargs):
+        # Runs controller.run_bulk on a background thread so Tk stays responsive.
+        # Results come back through the UI dispatcher and update the rows as they arrive.
+        collected = []
+        pending_text = BULK_STATUS_TEXT[action][0]
+        for idx in indices:
+            self.set_device_status(idx, pending_text + "...")
+
+        rate_limit = BULK_START_RATE if action == "start" else None
+
+        def on_result(result):
+            collected.append(result)
+            done_text = BULK_STATUS_TEXT[action][1] if result['success'] else "Failed"
+            self.ui.post(self.show_bulk_result, result['index'], done_text, key=('device_status', result['index']))
+
+        def worker():
+            try:
+                self.controller.run_bulk(action, indices, rate_limit=rate_limit, on_result=on_result, **kwargs)
+            finally:
+                if on_done:
+                    self.ui.post(on_done, list(collected))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def set_device_status(self, index, text):
+        self.device_status_override[str(index)] = text
+        self.device_list_scroll.refresh_item(str(index))
+
+    def show_bulk_result(self, index, text):
+        # "Applied"/"Failed" may not change the list2 row (modify never does),
+        # so the override is dropped after a while rather than on a state change
+        self.set_device_status(index, text)
+        self.after(BULK_STATUS_HOLD_MS, self.clear_device_status, index, text)
+
+    def clear_device_status(self, index, text):
+        # Only if it's still ours, a newer bulk action may have set its own
+        if self.device_status_override.get(str(index)) == text:
+            del self.device_status_override[str(index)]
+            self.device_list_scroll.refresh_item(str(index))
 
     def add_instance_dialog(self):
         dialog = ctk.CTkInputDialog(text="Enter name for new instance:", title="New Instance")
         name = dialog.get_input()
         if name:
             self.controller.create_instance(name)
-            self.after(500, self.refresh_instances)
 
     def auto_arrange_click(self):
         self.controller.sort_windows()
@@ -0,0 +1,74 @@
+import itertools
+import threading
+
+
+class UIDispatcher:
+    # Hands UI work from any thread to the Tk thread. Calls are queued and run
+    # in batches from an after() loop at a fixed frame rate, so workers never
+    # touch widgets and Tk is not flooded with one after() per update.
+    #
+    # Updates with the same key are merged: a later post replaces the queued
+    # one, and configure() calls on the same widget merge their options. A
+    # timer label updated by a busy thread is redrawn at most once per frame.
+    #
+    #   ui = UIDispatcher(app, fps=30)
+    #   ui.start()
+    #   ui.configure(label, text="00:01:05")            # from any thread
+    #   ui.post(app.refresh_instances, key="refresh")   # coalesced
+    def __init__(self, root, fps=30, max_batch=500):
+        self.root = root
+        self.interval = max(1, int(1000 / fps))
+        self.max_batch = max_batch # calls per frame, the rest waits for the next frame
+        self.pending = {} # key -> [func, args, kwargs], oldest first
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.running = False
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.root.after(self.interval, self._tick)
+
+    def stop(self):
+        self.running = False
+
+    def post(self, func, *args, key=None, **kwargs):
+        # Runs func(*args, **kwargs) on the Tk thread. With a key, replaces a
+        # queued call with the same key (and moves it to the back).
+        if key is None:
+            key = ('call', next(self.counter))
+        with self.lock:
+            self.pending.pop(key, None)
+            self.pending[key] = [func, args, kwargs]
+
+    def configure(self, widget, **options):
+        # widget.configure(**options) on the Tk thread, merged with queued options
+        key = ('configure', id(widget))
+        with self.lock:
+            entry = self.pending.pop(key, None)
+            if entry is None:
+                entry = [widget.configure, (), {}]
+            entry[2].update(options)
+            self.pending[key] = entry
+
+    def __len__(self):
+        with self.lock:
+            return len(self.pending)
+
+    def flush(self):
+        # Runs up to max_batch queued calls now, must be called on the Tk thread
+        with self.lock:
+            keys = list(itertools.islice(self.pending, self.max_batch))
+            batch = [self.pending.pop(key) for key in keys]
+        for func, args, kwargs in batch:
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"[UI] Update {getattr(func, '__name__', func)} failed: {e}")
+        return len(batch)
+
+    def _tick(self):
+        if not self.running:
+            return
+        self.flush()
+        self.root.after(self.interval, self._tick)
@@ -0,0 +1,159 @@
+import sys
+import customtkinter as ctk
+from selection_model import SelectionModel
+from inventory import diff_snapshots
+
+class VirtualList(ctk.CTkFrame):
+    # Scrollable list that only keeps widgets for the rows in view (plus a small
+    # buffer) and rebinds them to other items while scrolling. The data lives in
+    # a plain list of items and selection in a SelectionModel, so neither
+    # selection nor filtering touch widgets.
+    #
+    #   create_row(frame, row) -> builds the child widgets into frame and stores
+    #                             them in the row dict (row['key'] is the bound item key)
+    #   bind_row(row, item)    -> shows item in a pooled row
+    def __init__(self, master, create_row, bind_row, key=lambda item: item, row_height=30, buffer=2, selection=None, **kwargs):
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.key = key
+        self.row_height = row_height
+        self.buffer = buffer
+        self.selection = selection or SelectionModel()
+        self.selection.subscribe(self._on_selection_change)
+
+        self.items = [] # full model
+        self.visible = [] # items after filter
+        self.filter = None
+        self.rows = [] # pooled row dicts
+        self.offset = 0 # pixels scrolled from the top
+
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.viewport.bind("<Configure>", lambda e: self.render())
+        self._bind_wheel(self.viewport)
+
+    # ---------- model ----------
+    def set_items(self, items):
+        # Replaces the model. Selection is kept for keys that still exist.
+        # Returns the keys that are new or whose item changed.
+        old = {self.key(item): item for item in self.items}
+        self.items = list(items)
+        new = {self.key(item): item for item in self.items}
+        diff = diff_snapshots(old, new)
+        changed = {self.key(item) for item in diff['added']}
+        changed.update(self.key(item) for _, item in diff['changed'])
+
+        self.selection.discard_all([k for k in self.selection.selected if k not in new])
+        self._apply_filter()
+        return changed
+
+    def set_filter(self, predicate=None):
+        self.filter = predicate
+        self._apply_filter()
+
+    def _apply_filter(self):
+        if self.filter:
+            self.visible = [item for item in self.items if self.filter(item)]
+        else:
+            self.visible = list(self.items)
+        self.render(rebind=True)
+
+    # ---------- selection ----------
+    def is_selected(self, key):
+        return key in self.selection
+
+    def set_selected(self, key, selected):
+        self.selection.set(key, selected)
+
+    def select_all(self):
+        # Selects what the current filter shows
+        self.selection.update(self.key(item) for item in self.visible)
+
+    def clear_selection(self):
+        self.selection.clear()
+
+    def _on_selection_change(self, added, removed):
+        # Only rows showing a key whose state flipped need rebinding
+        changed = added | removed
+        for row in self.rows:
+            if row['item'] is not None and row['key'] in changed:
+                self.bind_row(row, row['item'])
+
+    def refresh_item(self, key):
+        for row in self.rows:
+            if row.get('key') == key and row.get('item') is not None:
+                self.bind_row(row, row['item'])
+
+    # ---------- rendering ----------
+    def render(self, rebind=False):
+        # Work in unscaled units, like the row_height and place() arguments
+        height = int(self.viewport.winfo_height() / self._get_widget_scaling())
+        if height <= 1:
+            return # Not mapped yet, <Configure> will call us again
+
+        rh = self.row_height
+        total = len(self.visible) * rh
+        self.offset = max(0, min(self.offset, total - height))
+
+        # Grow the pool to cover the viewport plus buffer rows above and below
+        needed = height // rh + 2 + self.buffer * 2
+        while len(self.rows) < needed:
+            frame = ctk.CTkFrame(self.viewport, fg_color="transparent", height=rh, corner_radius=0)
+            frame.pack_propagate(False)
+            row = {'frame': frame, 'key': None, 'item': None}
+            self.create_row(frame, row)
+            self._bind_wheel(frame)
+            self.rows.append(row)
+
+        first = self.offset // rh - self.buffer
+        for slot, row in enumerate(self.rows):
+            pos = first + slot
+            if 0 <= pos < len(self.visible):
+                item = self.visible[pos]
+                if rebind or row['item'] != item:
+                    row['key'] = self.key(item)
+                    row['item'] = item
+                    self.bind_row(row, item)
+                row['frame'].place(x=0, y=pos * rh - self.offset, relwidth=1)
+            elif row['item'] is not None:
+                row['key'] = None
+                row['item'] = None
+                row['frame'].place_forget()
+
+        if total > 0:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + height) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, offset):
+        self.offset = int(offset)
+        self.render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        total = len(self.visible) * self.row_height
+        if action == 'moveto':
+            self.scroll_to(float(value) * total)
+        elif action == 'scroll':
+            step = int(self.viewport.winfo_height() / self._get_widget_scaling()) if unit == 'pages' else self.row_height
+            self.scroll_to(self.offset + int(value) * step)
+
+    def _on_wheel(self, event):
+        if sys.platform.startswith("win"):
+            delta = -int(event.delta / 40)
+        elif sys.platform == "darwin":
+            delta = -event.delta
+        else:
+            delta = -1 if event.num == 4 else 1
+        self._on_scrollbar('scroll', delta, 'units')
+
+    def _bind_wheel(self, widget):
+        # Bound per widget (not bind_all) so other scrollable frames keep their wheel
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(sequence, self._on_wheel, add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel(child)